@@ -0,0 +1,159 @@
+import numpy as np
+
+STRESS_LEVELS = ("low_stress", "medium_stress", "high_stress")
+MAX_WEIGHT = 5
+
+# Running totals kept next to the results table. They are updated in the same
+# transaction as each batch of inserts, so they are always consistent with it
+# and their size doesn't depend on how many results exist.
+AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agg_weight_counts (
+    question_id TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (question_id, weight)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agg_score_counts (
+    score INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agg_bands (
+    stress_level TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agg_daily (
+    day TEXT NOT NULL,
+    stress_level TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_percentage REAL NOT NULL,
+    PRIMARY KEY (day, stress_level)
+) WITHOUT ROWID;
+"""
+
+def percentile_ranks(counts, values):
+    # Percentage of the counted population below each value, with ties counted
+    # half (the usual percentile rank). counts[..., v] is how many scored v.
+    cumulative = np.cumsum(counts, axis=-1)
+    values = values[..., None]
+    equal = np.take_along_axis(counts, values, axis=-1)[..., 0]
+    below = np.take_along_axis(cumulative, values, axis=-1)[..., 0] - equal
+    total = cumulative[..., -1]
+    return np.divide((below + equal / 2) * 100, total, out=np.zeros(np.shape(total)), where=total > 0)
+
+class CohortAggregates:
+    # Counts per question per weight, per total score, per stress band and per
+    # (day, band). add() is O(1) per assessment; everything the dashboard shows
+    # is derived from these fixed-size counters.
+    #
+    # Scores are small integers (weights 1-5, totals up to 8 * 5), so the
+    # weight and total score counts are exact histograms rather than
+    # approximate quantile sketches: percentile lookups are exact and O(1),
+    # and aggregates from separate workers merge by adding counts.
+    def __init__(self, question_ids):
+        self.question_ids = tuple(question_ids)
+        self.weight_counts = np.zeros((len(self.question_ids), MAX_WEIGHT + 1), dtype=np.int64)
+        self.score_counts = np.zeros(len(self.question_ids) * MAX_WEIGHT + 1, dtype=np.int64)
+        self.band_counts = dict.fromkeys(STRESS_LEVELS, 0)
+        # (day, stress_level) -> [count, total_percentage]
+        self.daily = {}
+        self._rows = np.arange(len(self.question_ids))
+
+    @property
+    def total(self):
+        return sum(self.band_counts.values())
+
+    def add(self, date, stress_level, stress_percentage, weights):
+        self.weight_counts[self._rows, weights] += 1
+        self.score_counts[sum(weights)] += 1
+        self.band_counts[stress_level] += 1
+        bucket = self.daily.setdefault((date[:10], stress_level), [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += stress_percentage
+
+    def merge(self, other):
+        # Adds another worker's counts into these
+        self.weight_counts += other.weight_counts
+        self.score_counts += other.score_counts
+        for stress_level, count in other.band_counts.items():
+            self.band_counts[stress_level] += count
+        for key, (count, total_percentage) in other.daily.items():
+            bucket = self.daily.setdefault(key, [0, 0.0])
+            bucket[0] += count
+            bucket[1] += total_percentage
+        return self
+
+    def score_percentile(self, weights):
+        # Percentile rank of a total score among every stored result; the
+        # stress percentage is proportional to the total, so this is also its rank
+        return float(percentile_ranks(self.score_counts, np.asarray(sum(weights))))
+
+    def category_percentiles(self, weights):
+        # Percentile rank of each answer weight among everyone's answers to that question
+        return percentile_ranks(self.weight_counts, np.asarray(weights))
+
+    def question_means(self):
+        answered = self.weight_counts.sum(axis=1)
+        totals = self.weight_counts @ np.arange(MAX_WEIGHT + 1)
+        return np.divide(totals, answered, out=np.zeros(len(self.question_ids)), where=answered > 0)
+
+    def question_histogram(self):
+        # (questions x weights 1..5)
+        return self.weight_counts[:, 1:]
+
+    def daily_trend(self):
+        # Sorted days with per-band counts (days x bands) and the mean stress percentage per day
+        days = sorted({day for day, _ in self.daily})
+        day_index = {day: i for i, day in enumerate(days)}
+        counts = np.zeros((len(days), len(STRESS_LEVELS)), dtype=np.int64)
+        totals = np.zeros(len(days))
+        for (day, stress_level), (count, total_percentage) in self.daily.items():
+            counts[day_index[day], STRESS_LEVELS.index(stress_level)] += count
+            totals[day_index[day]] += total_percentage
+        per_day = counts.sum(axis=1)
+        mean_percentage = np.divide(totals, per_day, out=np.zeros(len(days)), where=per_day > 0)
+        return days, counts, mean_percentage
+
+    def save(self, conn):
+        # Adds these counts to the persisted totals; call inside the insert transaction
+        conn.executemany(
+            "INSERT INTO agg_weight_counts (question_id, weight, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (question_id, weight) DO UPDATE SET count = count + excluded.count",
+            [
+                (self.question_ids[i], int(weight), int(self.weight_counts[i, weight]))
+                for i, weight in zip(*np.nonzero(self.weight_counts))
+            ]
+        )
+        conn.executemany(
+            "INSERT INTO agg_score_counts (score, count) VALUES (?, ?) "
+            "ON CONFLICT (score) DO UPDATE SET count = count + excluded.count",
+            [(int(score), int(self.score_counts[score])) for score in np.nonzero(self.score_counts)[0]]
+        )
+        conn.executemany(
+            "INSERT INTO agg_bands (stress_level, count) VALUES (?, ?) "
+            "ON CONFLICT (stress_level) DO UPDATE SET count = count + excluded.count",
+            [(stress_level, count) for stress_level, count in self.band_counts.items() if count]
+        )
+        conn.executemany(
+            "INSERT INTO agg_daily (day, stress_level, count, total_percentage) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (day, stress_level) DO UPDATE SET "
+            "count = count + excluded.count, total_percentage = total_percentage + excluded.total_percentage",
+            [(day, stress_level, count, total) for (day, stress_level), (count, total) in self.daily.items()]
+        )
+
+    @classmethod
+    def load(cls, conn, question_ids, include_daily=True):
+        # include_daily=False skips the one table that grows over time
+        aggregates = cls(question_ids)
+        question_index = {question_id: i for i, question_id in enumerate(aggregates.question_ids)}
+        for question_id, weight, count in conn.execute("SELECT question_id, weight, count FROM agg_weight_counts"):
+            if question_id in question_index:
+                aggregates.weight_counts[question_index[question_id], weight] = count
+        for score, count in conn.execute("SELECT score, count FROM agg_score_counts"):
+            aggregates.score_counts[score] = count
+        for stress_level, count in conn.execute("SELECT stress_level, count FROM agg_bands"):
+            aggregates.band_counts[stress_level] = count
+        if not include_daily:
+            return aggregates
+        for day, stress_level, count, total in conn.execute("SELECT day, stress_level, count, total_percentage FROM agg_daily"):
+            aggregates.daily[(day, stress_level)] = [count, total]
+        return aggregates
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import figures
+from youthwell import YouthWellBeingAssessment
+
+APP_PATH = str(Path(__file__).resolve().with_name("youthwell.py"))
+APP_DIR = str(Path(APP_PATH).parent)
+DEFAULT_OUTPUT = "bench_results.json"
+
+# Modules that should only load once a user reaches the results page or dashboard
+DEFERRED_MODULES = ("pandas", "plotly.express")
+
+FIRST_RENDER_CODE = f"""
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({APP_PATH!r}, default_timeout=60).run()
+assert not at.exception, at.exception
+"""
+
+def measure(func, repeat=5, min_time=0.2):
+    # Like timeit: pick a loop count that runs for at least min_time, then
+    # report per-call seconds over several repeats
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return {"min": min(timings), "median": statistics.median(timings), "number": number, "repeat": repeat}
+
+def scoring_benchmarks(batch_size):
+    assessment = YouthWellBeingAssessment()
+    rng = np.random.default_rng(0)
+    weights = rng.integers(1, 6, size=(batch_size, len(assessment.questions)), dtype=np.int8)
+    responses = dict(zip(assessment.question_ids, weights[0].tolist()))
+    rows = [dict(zip(assessment.question_ids, row)) for row in weights.tolist()]
+
+    def loop_batch():
+        for row in rows:
+            assessment.calculate_stress_level(row)
+            assessment.generate_insights(row)
+
+    yield "scoring.calculate_stress_level", lambda: assessment.calculate_stress_level(responses)
+    yield "scoring.generate_insights", lambda: assessment.generate_insights(responses)
+    yield f"scoring.per_user_loop[{batch_size}]", loop_batch
+    yield f"scoring.score_batch[{batch_size}]", lambda: assessment.score_batch(weights)
+
+def figure_benchmarks():
+    scores = (4, 2, 3, 5, 1, 2, 4, 3)
+    figures.category_bar_figure(scores)
+    figures.gauge_figure(60.0)
+
+    yield "figures.build_gauge", lambda: figures.build_gauge(60.0)
+    yield "figures.build_category_bar", lambda: figures.build_category_bar(scores)
+    yield "figures.gauge_figure_cached", lambda: figures.gauge_figure(60.0)
+    yield "figures.category_bar_figure_cached", lambda: figures.category_bar_figure(scores)
+
+def app_benchmarks():
+    from streamlit.testing.v1 import AppTest
+
+    questionnaire = AppTest.from_file(APP_PATH, default_timeout=60)
+    questionnaire.run()
+
+    results = AppTest.from_file(APP_PATH, default_timeout=60)
+    results.run()
+    for radio in results.radio:
+        radio.set_value(radio.options[2])
+    results.button[0].click().run()
+    if not results.session_state.assessment_complete:
+        raise RuntimeError("Could not reach the results page")
+
+    yield "app.rerun_questionnaire", questionnaire.run
+    yield "app.rerun_results", results.run
+
+def run_cold(code):
+    # Fresh interpreter per call, so nothing is already imported
+    subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, check=True, capture_output=True)
+
+def startup_benchmarks():
+    yield "startup.import_youthwell", lambda: run_cold("import youthwell")
+    yield "startup.first_questionnaire_render", lambda: run_cold(FIRST_RENDER_CODE)
+
+def import_time_breakdown(code=FIRST_RENDER_CODE, top=15):
+    # Parses python -X importtime output (self and cumulative microseconds per
+    # module) and sums self time by top-level package
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, check=True, capture_output=True, text=True
+    )
+    packages = {}
+    modules = set()
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+        total += int(self_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "total_seconds": total / 1e6,
+        "packages": {package: us / 1e6 for package, us in ranked[:top]},
+        "deferred_modules_loaded": [module for module in DEFERRED_MODULES if module in modules]
+    }
+
+def print_breakdown(breakdown):
+    print(f"Import time for the first questionnaire render: {format_seconds(breakdown['total_seconds'])}")
+    for package, seconds in breakdown["packages"].items():
+        print(f"  {package:43s} {format_seconds(seconds):>10s}")
+    if breakdown["deferred_modules_loaded"]:
+        print(f"  WARNING: loaded before the results page: {', '.join(breakdown['deferred_modules_loaded'])}")
+
+SUITES = {
+    "scoring": lambda args: scoring_benchmarks(args.batch_size),
+    "figures": lambda args: figure_benchmarks(),
+    "app": lambda args: app_benchmarks(),
+    "startup": lambda args: startup_benchmarks()
+}
+
+def run_benchmarks(args):
+    results = {}
+    for suite in args.suites:
+        for name, func in SUITES[suite](args):
+            results[name] = measure(func, repeat=args.repeat, min_time=args.min_time)
+            print(f"{name:45s} {format_seconds(results[name]['min']):>10s} min "
+                  f"{format_seconds(results[name]['median']):>10s} median")
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": results
+    }
+    if "figures" in args.suites or "app" in args.suites:
+        # Hit rate of the shared figure caches over the runs above
+        report["figure_cache"] = figures.figure_cache_stats()
+    if "startup" in args.suites:
+        report["import_time"] = import_time_breakdown()
+        print_breakdown(report["import_time"])
+    return report
+
+def compare(baseline, current, threshold):
+    # A benchmark regresses when its best time is more than threshold slower
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print(f"{name:45s} {'new':>10s}")
+            continue
+        ratio = result["min"] / before["min"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ("improved" if ratio < 1 - threshold else "")
+        print(f"{name:45s} {format_seconds(before['min']):>10s} -> {format_seconds(result['min']):>10s} "
+              f"{ratio:6.2f}x {flag}")
+        if flag == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark YouthWell scoring, chart construction, app reruns and cold start")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"where to write results (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--baseline", help="saved results to compare against; exits 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (default: 0.10)")
+    parser.add_argument("--suites", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing loop")
+    args = parser.parse_args(argv)
+
+    # Keep app reruns away from the real results database and history
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["YOUTHWELL_DB_PATH"] = os.path.join(tmp, "bench_results.db")
+        os.environ["YOUTHWELL_HISTORY_DIR"] = os.path.join(tmp, "history")
+        current = run_benchmarks(args)
+
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+SOURCE_PATH = Path(__file__).with_name("content_catalog.json")
+INDEX_PATH = Path(__file__).with_name("content_catalog.idx")
+DEFAULT_LANGUAGE = "en"
+
+# Where an index is built when the shipped one doesn't match the source
+# (the package directory may be read-only)
+CACHE_DIR = Path(os.environ.get("YOUTHWELL_CACHE_DIR") or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "youthwell")
+
+MAGIC = b"YWCAT01\0"
+HEADER_BYTES = 16
+
+# Index file layout (little endian):
+#   magic (8 bytes) | directory length (uint64)
+#   directory: JSON with section offsets, key -> [start, count] into postings
+#              and the size and sha256 of the source file it was built from
+#   padding to 8 bytes
+#   record offsets: uint64 x (records + 1), relative to the records section
+#   postings: uint32 record ids, sorted within each key
+#   records: UTF-8 JSON, one after another
+# Keys are "kind/band/language/category" plus "kind/band/language/*" for
+# every record in a band. Only the directory is parsed on open; postings and
+# records are read straight from the memory map.
+
+def index_key(kind, band, language, category):
+    return f"{kind}/{band}/{language}/{category}"
+
+def source_hash(source=SOURCE_PATH):
+    with open(source, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_index(source=SOURCE_PATH, output=INDEX_PATH):
+    with open(source, "rb") as f:
+        raw = f.read()
+    items = json.loads(raw)
+
+    postings = {}
+    blobs = []
+    for record_id, item in enumerate(items):
+        kind = item["kind"]
+        language = item.get("language", DEFAULT_LANGUAGE)
+        for band in item["bands"]:
+            for category in list(item.get("categories", [])) + ["*"]:
+                postings.setdefault(index_key(kind, band, language, category), []).append(record_id)
+        record = {key: value for key, value in item.items() if key not in ("kind", "bands", "categories", "language")}
+        blobs.append(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+    offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+    keys = {}
+    posting_ids = []
+    for key in sorted(postings):
+        keys[key] = [len(posting_ids), len(postings[key])]
+        posting_ids.extend(postings[key])
+    posting_ids = np.array(posting_ids, dtype="<u4")
+
+    # Section offsets depend on the directory length, so size it with zero
+    # placeholders plus room for the real offsets' digits, then pad to that size
+    directory = {
+        "records": len(blobs), "keys": keys, "source_size": len(raw), "source_sha256": hashlib.sha256(raw).hexdigest(),
+        "offsets_at": 0, "postings_at": 0, "records_at": 0
+    }
+    directory_bytes = len(json.dumps(directory).encode()) + 64
+    offsets_at = HEADER_BYTES + directory_bytes
+    offsets_at += -offsets_at % 8
+    directory["offsets_at"] = offsets_at
+    directory["postings_at"] = offsets_at + offsets.nbytes
+    directory["records_at"] = directory["postings_at"] + posting_ids.nbytes
+    encoded = json.dumps(directory).encode().ljust(offsets_at - HEADER_BYTES)
+
+    # Write then rename, so a worker never maps a half-written file
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([len(encoded)], dtype="<u8").tobytes())
+        f.write(encoded)
+        f.write(offsets.tobytes())
+        f.write(posting_ids.tobytes())
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, output)
+    return len(blobs)
+
+def user_seed(user_key):
+    # Stable across processes and restarts, unlike hash()
+    return zlib.crc32(str(user_key).encode("utf-8"))
+
+class ContentCatalog:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != MAGIC:
+            raise ValueError(f"{path} is not a content index")
+        directory_length = int(np.frombuffer(self._map, dtype="<u8", count=1, offset=8)[0])
+        directory = json.loads(self._map[HEADER_BYTES:HEADER_BYTES + directory_length])
+        self.keys = directory["keys"]
+        self.source_size = directory.get("source_size")
+        self.source_sha256 = directory.get("source_sha256")
+        self.record_count = directory["records"]
+        self._records_at = directory["records_at"]
+        self._offsets = np.frombuffer(self._map, dtype="<u8", count=self.record_count + 1, offset=directory["offsets_at"])
+        self._postings = np.frombuffer(
+            self._map, dtype="<u4",
+            count=(directory["records_at"] - directory["postings_at"]) // 4,
+            offset=directory["postings_at"]
+        )
+
+    @classmethod
+    def open(cls, source=SOURCE_PATH, path=INDEX_PATH):
+        # Uses the shipped index when the source is still the size it was built
+        # from, which costs one stat per worker start rather than reading and
+        # hashing the source (test_shipped_index_matches_source catches an edit
+        # that keeps the size). Otherwise builds (once) a copy named after the
+        # source hash in CACHE_DIR.
+        if os.path.exists(path):
+            catalog = cls(path)
+            if catalog.source_size == os.path.getsize(source):
+                return catalog
+            catalog.close()
+        expected = source_hash(source)
+        cached = CACHE_DIR / f"content_catalog-{expected[:16]}.idx"
+        if not cached.exists():
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            build_index(source, cached)
+        return cls(cached)
+
+    def close(self):
+        # The postings and offsets views must go before the map can close
+        self._offsets = self._postings = None
+        self._map.close()
+
+    def postings(self, kind, band, language, category):
+        start, count = self.keys.get(index_key(kind, band, language, category), (0, 0))
+        return self._postings[start:start + count]
+
+    def record(self, record_id):
+        start = self._records_at + int(self._offsets[record_id])
+        end = self._records_at + int(self._offsets[record_id + 1])
+        return json.loads(self._map[start:end])
+
+    def has_language(self, kind, band, language):
+        return index_key(kind, band, language, "*") in self.keys
+
+    def select(self, kind, band, categories=(), language=DEFAULT_LANGUAGE, seed=0, limit=6):
+        # Records for the band that match any of the given categories come
+        # first, then the rest of the band; each group is shuffled
+        # deterministically from the seed
+        if not self.has_language(kind, band, language):
+            language = DEFAULT_LANGUAGE
+        rng = np.random.default_rng([seed, zlib.crc32(f"{kind}/{band}".encode())])
+        matched = [self.postings(kind, band, language, category) for category in categories]
+        focused = np.unique(np.concatenate(matched)) if matched else np.empty(0, dtype="<u4")
+        order = rng.choice(focused, size=min(limit, len(focused)), replace=False)
+        if len(order) < limit:
+            rest = np.setdiff1d(self.postings(kind, band, language, "*"), focused, assume_unique=True)
+            order = np.concatenate((order, rng.choice(rest, size=min(limit - len(order), len(rest)), replace=False)))
+        return [self.record(int(record_id)) for record_id in order]
+
+def main(argv=None):
+    # Run after editing content_catalog.json and commit the rebuilt index with it
+    parser = argparse.ArgumentParser(description="Build the memory-mapped content index from content_catalog.json")
+    parser.add_argument("--source", default=str(SOURCE_PATH))
+    parser.add_argument("--output", default=str(INDEX_PATH))
+    args = parser.parse_args(argv)
+    count = build_index(args.source, args.output)
+    print(f"Indexed {count:,} records into {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+from ingest import flat_column_names, parquet_schema
+from store import DEFAULT_DB_PATH, QUESTION_IDS, connect_readonly, iter_rows, row_to_summary
+from youthwell import YouthWellBeingAssessment
+
+def flat_row(row):
+    # Stored row (COLUMNS order) -> flat_column_names order
+    date, stress_level, stress_percentage, *weights, insights = row
+    return (date, *weights, stress_percentage, stress_level, insights)
+
+class CsvExporter:
+    # Same columns as the Parquet output; insights stay a JSON array in one column
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(flat_column_names(QUESTION_IDS, insights=True))
+
+    def write(self, rows):
+        self.writer.writerows(flat_row(row) for row in rows)
+
+    def close(self):
+        self.file.close()
+
+class JsonlExporter:
+    # One results summary per line, in the downloadable results JSON shape,
+    # so the output can be fed straight back into ingest.py
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(row_to_summary(row), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+class ParquetExporter:
+    # ingest.py's Parquet layout plus the insights, one row group per chunk so
+    # memory stays bounded by the chunk size
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow), or export to .csv or .jsonl instead")
+        self.pa = pa
+        self.levels = pa.array(YouthWellBeingAssessment.STRESS_LEVELS.tolist())
+        self.level_index = {level: i for i, level in enumerate(self.levels.to_pylist())}
+        self.schema = parquet_schema(pa, QUESTION_IDS, insights=True)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        pa = self.pa
+        dates, stress_levels, stress_percentages, *weights, insights = zip(*rows)
+        columns = (
+            [pa.array(dates).cast(pa.timestamp("s"))]
+            + [pa.array(column, type=pa.int8()) for column in weights]
+            + [
+                pa.array(stress_percentages, type=pa.float64()),
+                pa.DictionaryArray.from_arrays(pa.array([self.level_index[level] for level in stress_levels], type=pa.int8()), self.levels),
+                pa.array([json.loads(value) for value in insights], type=pa.list_(pa.string()))
+            ]
+        )
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+EXPORTERS = {".csv": CsvExporter, ".jsonl": JsonlExporter, ".parquet": ParquetExporter}
+
+def export(db_path, output, start=None, end=None, stress_level=None, chunk_size=10000):
+    # Streams rows chunk by chunk from a read-only connection; SQLite's WAL
+    # gives the export a consistent snapshot while the app keeps writing
+    exporter_class = EXPORTERS.get(os.path.splitext(str(output))[1])
+    if exporter_class is None:
+        raise SystemExit(f"Output file must end in {', '.join(EXPORTERS)}")
+    try:
+        conn = connect_readonly(db_path)
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+
+    exporter = exporter_class(output)
+    rows_written = 0
+    started = time.perf_counter()
+    try:
+        for rows in iter_rows(conn, start, end, stress_level, chunk_size=chunk_size):
+            exporter.write(rows)
+            rows_written += len(rows)
+    finally:
+        exporter.close()
+        conn.close()
+    return {"rows": rows_written, "seconds": time.perf_counter() - started}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored results to CSV, JSONL or Parquet without loading them all into memory")
+    parser.add_argument("output", help="output file ending in .csv, .jsonl or .parquet")
+    parser.add_argument("--db", default=os.environ.get("YOUTHWELL_DB_PATH", DEFAULT_DB_PATH), help="results database")
+    parser.add_argument("--start", help="first date to include (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--end", help="date to stop before (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--stress-level", choices=YouthWellBeingAssessment.STRESS_LEVELS.tolist())
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows fetched and written at a time")
+    args = parser.parse_args(argv)
+
+    stats = export(args.db, args.output, args.start, args.end, args.stress_level, args.chunk_size)
+
+    seconds = max(stats["seconds"], 1e-9)
+    print(f"Exported {stats['rows']:,} results to {args.output} in {seconds:.2f}s ({stats['rows'] / seconds:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
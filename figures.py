@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from threading import Lock
+
+import metrics
+
+# Plotly (and pandas, which plotly.express pulls in) is imported inside the
+# builders so only the results view pays for it
+
+CATEGORY_LABELS = ['Sleep', 'Stress', 'Social', 'Physical', 'Mood', 'Focus', 'Life Sat.', 'Anxiety']
+
+def build_gauge(stress_percentage, reference=None):
+    import plotly.graph_objects as go
+
+    # Gauge chart for stress level
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = stress_percentage,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Stress Level (%)"},
+        # Compared with the user's previous assessment when there is one
+        delta = None if reference is None else {
+            'reference': reference,
+            'increasing': {'color': "red"},
+            'decreasing': {'color': "green"}
+        },
+        gauge = {
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 40], 'color': "lightgreen"},
+                {'range': [40, 70], 'color': "yellow"},
+                {'range': [70, 100], 'color': "red"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+def build_category_bar(scores):
+    import plotly.express as px
+
+    # Category breakdown
+    scores = list(scores)
+    fig_bar = px.bar(
+        x=CATEGORY_LABELS,
+        y=scores,
+        title="Category Breakdown",
+        color=scores,
+        color_continuous_scale="RdYlGn_r"
+    )
+    fig_bar.update_layout(height=300, showlegend=False)
+    return fig_bar
+
+class FigureCache:
+    # Bounded LRU of built figures, shared by every session in the process.
+    # Cached figures must be treated as read-only by callers.
+    def __init__(self, build, maxsize):
+        self.build = build
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+
+        # Build outside the lock so a slow px.bar doesn't block cache hits
+        fig = self.build(key)
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return fig
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._figures),
+                "maxsize": self.maxsize
+            }
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self.hits = 0
+            self.misses = 0
+
+# The gauge only depends on the percentage (8..40 points -> 33 values) and the
+# previous percentage it is compared with; the bar chart depends on the full
+# response tuple (5^8 combinations), so it gets a larger bound
+gauge_cache = FigureCache(lambda key: build_gauge(*key), maxsize=1024)
+category_bar_cache = FigureCache(build_category_bar, maxsize=2048)
+
+def gauge_figure(stress_percentage, reference=None):
+    return gauge_cache.get((stress_percentage, reference))
+
+def category_bar_figure(scores):
+    return category_bar_cache.get(tuple(scores))
+
+def figure_cache_stats():
+    return {
+        "gauge": gauge_cache.stats(),
+        "category_bar": category_bar_cache.stats()
+    }
+
+# Exported with the section latencies (see metrics.py)
+FIGURE_CACHE_METRICS = (
+    ("hits", "youthwell_figure_cache_hits_total", "counter", "Figures served from the cache"),
+    ("misses", "youthwell_figure_cache_misses_total", "counter", "Figures built because they were not cached"),
+    ("size", "youthwell_figure_cache_size", "gauge", "Figures currently cached")
+)
+
+def figure_cache_metrics():
+    stats = figure_cache_stats()
+    lines = []
+    for field, metric, kind, description in FIGURE_CACHE_METRICS:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for cache, values in stats.items():
+            lines.append(f'{metric}{{cache="{cache}"}} {values[field]}')
+    return lines
+
+metrics.registry.add_collector(figure_cache_metrics)
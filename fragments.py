@@ -0,0 +1,83 @@
+import re
+from functools import lru_cache
+
+# Pre-rendered HTML for the static parts of the results page. Each section is
+# one string (header included) so the page sends it as a single element, and
+# each distinct input is rendered once per process.
+
+RECOMMENDATIONS = (
+    ("📱", "Digital Wellness", (
+        "Limit social media usage",
+        "Practice digital detox regularly",
+        "Use apps for meditation and mindfulness",
+        "Set boundaries for screen time"
+    )),
+    ("😴", "Sleep Hygiene", (
+        "Maintain consistent sleep schedule",
+        "Create a relaxing bedtime routine",
+        "Keep bedroom cool and dark",
+        "Avoid screens 1 hour before bed"
+    )),
+    ("🍎", "Nutrition Tips", (
+        "Eat regular, balanced meals",
+        "Stay hydrated (8-10 glasses water/day)",
+        "Include omega-3 rich foods",
+        "Limit caffeine and sugar intake"
+    )),
+    ("🤝", "Social Support", (
+        "Connect with friends and family regularly",
+        "Join clubs or groups with similar interests",
+        "Practice active listening",
+        "Seek professional help when needed"
+    ))
+)
+
+SLOKA_FIELDS = ("chapter", "sanskrit", "translation", "relevance")
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+def inline_markdown(text):
+    # Markdown isn't parsed inside raw HTML blocks, so convert the bold markers
+    # the content uses
+    return _BOLD.sub(r"<strong>\1</strong>", text)
+
+def section_header(title):
+    return f'<h3 class="section-header">{title}</h3>'
+
+@lru_cache(maxsize=64)
+def insights_html(insights):
+    # insights: tuple of messages, one combination per distinct set of rule flags
+    if not insights:
+        return ""
+    boxes = "".join(f'<div class="suggestion-box">{inline_markdown(insight)}</div>' for insight in insights)
+    return section_header("💡 Personal Insights") + boxes
+
+@lru_cache(maxsize=1024)
+def exercises_html(exercises):
+    boxes = "".join(f'<div class="suggestion-box">{inline_markdown(exercise)}</div>' for exercise in exercises)
+    return section_header("🏃‍♀️ Recommended Exercises") + f'<div class="suggestion-grid">{boxes}</div>'
+
+def sloka_key(slokas):
+    # Hashable form of the sloka records for slokas_html
+    return tuple(tuple(sloka[field] for field in SLOKA_FIELDS) for sloka in slokas)
+
+@lru_cache(maxsize=1024)
+def slokas_html(slokas):
+    boxes = "".join(
+        f'<div class="sloka-box">'
+        f'<h4 style="color: #8B4513; margin-bottom: 10px;">{chapter}</h4>'
+        f'<p style="font-size: 1.1em; color: #2F4F4F; margin-bottom: 15px;"><strong>Sanskrit:</strong><br>{sanskrit}</p>'
+        f'<p style="color: #556B2F; margin-bottom: 10px;"><strong>Translation:</strong><br>{translation}</p>'
+        f'<p style="color: #8B0000; font-size: 0.9em;"><strong>Relevance:</strong> {relevance}</p>'
+        f'</div>'
+        for chapter, sanskrit, translation, relevance in slokas
+    )
+    return section_header("🕉️ Wisdom from Bhagavad Gita") + boxes
+
+@lru_cache(maxsize=1)
+def recommendations_html():
+    blocks = "".join(
+        f'<div><h3>{icon} <strong>{title}</strong></h3><ul>{"".join(f"<li>{tip}</li>" for tip in tips)}</ul></div>'
+        for icon, title, tips in RECOMMENDATIONS
+    )
+    return section_header("🌟 Additional Recommendations") + f'<div class="suggestion-grid">{blocks}</div>'
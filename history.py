@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+
+DEFAULT_HISTORY_DIR = "youthwell_history"
+
+# One fixed-width 16-byte record per completed assessment: UTC epoch seconds
+# plus the 8 answer weights in question order. A user's history is one
+# append-only file of these records, so loading it is a single np.fromfile.
+RECORD_DTYPE = np.dtype([("timestamp", "<i8"), ("weights", "i1", (8,))])
+
+_SAFE_USER_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+class HistoryStore:
+    def __init__(self, directory=DEFAULT_HISTORY_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, user_id):
+        # User ids come from the URL, so anything that isn't a plain token is
+        # hashed; "=" can't appear in a plain token, so the two never collide
+        if not _SAFE_USER_ID.fullmatch(user_id):
+            user_id = f"sha256={hashlib.sha256(user_id.encode('utf-8')).hexdigest()}"
+        return os.path.join(self.directory, f"{user_id}.bin")
+
+    def append(self, user_id, timestamp, weights):
+        # timestamp may be naive (local time, like the results date) or aware
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["timestamp"] = int(timestamp.astimezone(timezone.utc).timestamp())
+        record["weights"] = weights
+        # A single 16-byte O_APPEND write, so concurrent appends don't interleave
+        with open(self.path(user_id), "ab") as f:
+            f.write(record.tobytes())
+
+    def load(self, user_id):
+        path = self.path(user_id)
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.fromfile(path, dtype=RECORD_DTYPE)
+
+def rolling_mean(values, window):
+    # Mean of the last `window` values at each point (fewer at the start)
+    cumulative = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+def local_times(epoch_seconds):
+    # Naive local datetimes, the same clock as the results date and downloads
+    return np.array([datetime.fromtimestamp(int(seconds)) for seconds in epoch_seconds], dtype="datetime64[s]")
+
+def summarize(records, assessment, window=4):
+    # Trends over one user's records, oldest first, all computed on whole arrays
+    weights = records["weights"]
+    stress_levels, stress_percentages = assessment.calculate_stress_levels(weights)
+    bands = assessment.stress_band_index(stress_percentages)
+
+    if len(weights) > 1:
+        category_deltas = weights[-1].astype(np.int16) - weights[-2]
+    else:
+        category_deltas = np.zeros(len(assessment.questions), dtype=np.int16)
+
+    return {
+        "timestamps": local_times(records["timestamp"]),
+        "stress_levels": stress_levels,
+        "stress_percentages": stress_percentages,
+        "rolling_percentages": rolling_mean(stress_percentages, window),
+        # Change per category since the previous assessment, and each category's recent mean
+        "category_deltas": category_deltas,
+        "category_rolling_means": weights[-window:].mean(axis=0),
+        "band_changes": int(np.count_nonzero(bands[1:] != bands[:-1]))
+    }
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from youthwell import YouthWellBeingAssessment
+
+# Matches the file name offered by the download button in youthwell.py
+ASSESSMENT_FILE_PATTERN = "youthwell_assessment_*.json"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_assessment = None
+
+def get_assessment():
+    # One assessment per worker process
+    global _assessment
+    if _assessment is None:
+        _assessment = YouthWellBeingAssessment()
+    return _assessment
+
+def parse_record(record, assessment):
+    # Validate one results_summary and return (date, weights in question order)
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    responses = record.get("responses")
+    if not isinstance(responses, dict):
+        raise ValueError("missing responses")
+    if set(responses) != set(assessment.question_ids):
+        missing = sorted(set(assessment.question_ids) - set(responses))
+        unknown = sorted(set(responses) - set(assessment.question_ids))
+        raise ValueError(f"response ids do not match the questions (missing {missing}, unknown {unknown})")
+
+    weights = []
+    for question in assessment.questions:
+        weight = responses[question.id]
+        if type(weight) is not int or weight not in question.option_by_weight:
+            raise ValueError(f"invalid weight {weight!r} for {question.id}")
+        weights.append(weight)
+
+    try:
+        date = datetime.strptime(record["date"], DATE_FORMAT)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"invalid date {record.get('date')!r}")
+    return date, weights
+
+def parse_chunk(kind, items):
+    # Worker entry point: parse a batch of files or JSONL lines into column arrays
+    assessment = get_assessment()
+    dates = []
+    rows = []
+    errors = []
+    nbytes = 0
+
+    for item in items:
+        try:
+            if kind == "files":
+                source = item
+                with open(item, "rb") as f:
+                    raw = f.read()
+            else:
+                source, raw = item
+            nbytes += len(raw)
+            date, weights = parse_record(json.loads(raw), assessment)
+        except Exception as e:
+            # Any failure is this record's alone (e.g. RecursionError from
+            # deeply nested JSON), so it is counted invalid, not fatal
+            errors.append((str(source), str(e) or type(e).__name__))
+            continue
+        dates.append(date)
+        rows.append(weights)
+
+    weights = np.array(rows, dtype=np.int8).reshape(len(rows), len(assessment.questions))
+    _, stress_percentages = assessment.calculate_stress_levels(weights)
+    return {
+        "date": np.array(dates, dtype="datetime64[s]"),
+        "weights": weights,
+        "stress_percentage": stress_percentages,
+        "stress_level": assessment.stress_band_index(stress_percentages),
+        "errors": errors,
+        "bytes": nbytes
+    }
+
+def iter_file_chunks(root, chunk_size):
+    chunk = []
+    for path in Path(root).rglob(ASSESSMENT_FILE_PATTERN):
+        chunk.append(str(path))
+        if len(chunk) == chunk_size:
+            yield "files", chunk
+            chunk = []
+    if chunk:
+        yield "files", chunk
+
+def iter_jsonl_chunks(path, chunk_size):
+    chunk = []
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            chunk.append((f"{path}:{line_number}", line))
+            if len(chunk) == chunk_size:
+                yield "lines", chunk
+                chunk = []
+    if chunk:
+        yield "lines", chunk
+
+class NpzWriter:
+    # Streams each column to a raw temp file, then packs them into an .npz
+    # whose arrays load with np.load like any np.savez output
+    def __init__(self, path, question_ids):
+        self.path = path
+        self.question_ids = question_ids
+        self.rows = 0
+        self.packing = False
+        # name -> (temp file, dtype, shape of one row); all created up front so
+        # an import with no valid records still writes every column, with 0 rows
+        self.columns = {
+            name: (open(f"{self.path}.{name}.tmp", "w+b"), np.dtype(dtype), row_shape)
+            for name, dtype, row_shape in (
+                ("date", "datetime64[s]", ()),
+                ("weights", np.int8, (len(question_ids),)),
+                ("stress_percentage", np.float64, ()),
+                ("stress_level", np.int8, ())
+            )
+        }
+
+    def write(self, chunk):
+        for name, (f, dtype, _) in self.columns.items():
+            chunk[name].astype(dtype, copy=False).tofile(f)
+        self.rows += len(chunk["date"])
+
+    def close(self):
+        self.packing = True
+        with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, (f, dtype, row_shape) in self.columns.items():
+                header = {
+                    "descr": np.lib.format.dtype_to_descr(dtype),
+                    "fortran_order": False,
+                    "shape": (self.rows,) + row_shape
+                }
+                with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                    np.lib.format.write_array_header_2_0(member, header)
+                    f.seek(0)
+                    while True:
+                        block = f.read(1 << 20)
+                        if not block:
+                            break
+                        member.write(block)
+                f.close()
+                os.remove(f.name)
+            for name, array in (
+                ("question_ids", np.array(self.question_ids)),
+                ("stress_levels", YouthWellBeingAssessment.STRESS_LEVELS)
+            ):
+                with archive.open(f"{name}.npy", "w") as member:
+                    np.lib.format.write_array(member, array, allow_pickle=False)
+
+    def abort(self):
+        # Removes the temp files, and the output if packing had started
+        for f, _, _ in self.columns.values():
+            f.close()
+            if os.path.exists(f.name):
+                os.remove(f.name)
+        if self.packing and os.path.exists(self.path):
+            os.remove(self.path)
+
+def flat_column_names(question_ids, insights=False):
+    # Column layout shared by this importer's Parquet output and export.py.
+    # Responses are flattened to "responses.<question id>" columns because the
+    # stress_level question id would otherwise clash with the stress_level result.
+    names = ["date"] + [f"responses.{question_id}" for question_id in question_ids] + ["stress_percentage", "stress_level"]
+    return names + ["insights"] if insights else names
+
+def parquet_schema(pa, question_ids, insights=False):
+    types = (
+        [pa.timestamp("s")] + [pa.int8()] * len(question_ids)
+        + [pa.float64(), pa.dictionary(pa.int8(), pa.string())] + ([pa.list_(pa.string())] if insights else [])
+    )
+    return pa.schema(list(zip(flat_column_names(question_ids, insights), types)))
+
+class ParquetWriter:
+    # One row group per parsed chunk, so memory stays bounded by the chunk size
+    def __init__(self, path, question_ids):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow), or write to a .npz file instead")
+        self.pa = pa
+        self.path = path
+        self.question_ids = question_ids
+        self.rows = 0
+        self.schema = parquet_schema(pa, question_ids)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, chunk):
+        pa = self.pa
+        levels = pa.DictionaryArray.from_arrays(
+            pa.array(chunk["stress_level"], type=pa.int8()),
+            pa.array(YouthWellBeingAssessment.STRESS_LEVELS.tolist())
+        )
+        columns = (
+            [pa.array(chunk["date"], type=pa.timestamp("s"))]
+            + [pa.array(chunk["weights"][:, i], type=pa.int8()) for i in range(len(self.question_ids))]
+            + [pa.array(chunk["stress_percentage"]), levels]
+        )
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+        self.rows += len(chunk["date"])
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        # The output is created up front, so a partial file is left to remove
+        self.writer.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def ingest(source, output, workers=None, chunk_size=512, max_errors_shown=20):
+    assessment = get_assessment()
+    if os.path.isdir(source):
+        chunks = iter_file_chunks(source, chunk_size)
+    else:
+        chunks = iter_jsonl_chunks(source, chunk_size)
+
+    if str(output).endswith(".parquet"):
+        writer = ParquetWriter(output, assessment.question_ids)
+    elif str(output).endswith(".npz"):
+        writer = NpzWriter(output, assessment.question_ids)
+    else:
+        raise SystemExit("Output file must end in .parquet or .npz")
+
+    workers = workers or os.cpu_count() or 1
+    stats = {"records": 0, "invalid": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    def consume(future):
+        chunk = future.result()
+        if len(chunk["date"]):
+            writer.write(chunk)
+        stats["records"] += len(chunk["date"])
+        stats["bytes"] += chunk["bytes"]
+        for source_name, reason in chunk["errors"]:
+            if stats["invalid"] < max_errors_shown:
+                print(f"skipped {source_name}: {reason}", file=sys.stderr)
+            stats["invalid"] += 1
+
+    # Keep a bounded number of chunks in flight so memory doesn't grow with the input
+    completed = False
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for kind, items in chunks:
+                pending.append(pool.submit(parse_chunk, kind, items))
+                if len(pending) >= workers * 2:
+                    consume(pending.popleft())
+            while pending:
+                consume(pending.popleft())
+        writer.close()
+        completed = True
+    finally:
+        # On an error or Ctrl-C, leave no temp files or half-written output
+        if not completed:
+            writer.abort()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Import downloaded youthwell_assessment_*.json files (a folder tree or one JSONL file) into a columnar file"
+    )
+    parser.add_argument("source", help="directory to search recursively, or a JSONL file with one results summary per line")
+    parser.add_argument("output", help="output file ending in .parquet or .npz")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=512, help="records per worker task")
+    args = parser.parse_args(argv)
+
+    stats = ingest(args.source, args.output, workers=args.workers, chunk_size=args.chunk_size)
+
+    seconds = max(stats["seconds"], 1e-9)
+    total = stats["records"] + stats["invalid"]
+    print(f"Imported {stats['records']:,} records ({stats['invalid']:,} invalid) into {args.output}")
+    print(f"{total:,} inputs, {stats['bytes'] / 1e6:.1f} MB in {seconds:.2f}s: "
+          f"{total / seconds:,.0f} records/s, {stats['bytes'] / 1e6 / seconds:.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
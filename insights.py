@@ -0,0 +1,110 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("insight_rules.json")
+
+COMPARATORS = (">=", ">", "<=", "<", "==")
+
+# Weights are int8, so sign * weight always lies within +-128. A bound past that
+# is always or never met, and clipping it to +-129 keeps that while fitting the
+# int16 threshold vector.
+BOUND_LIMIT = np.iinfo(np.int8).max + 2
+
+class InsightRules:
+    # A table of {"question_id", "comparator", "threshold", "message"} rules,
+    # compiled once into a column index vector, a sign vector and a threshold
+    # vector. Weights are integers, so every comparator can be rewritten as
+    # sign * weight >= threshold:
+    #   w >= t  ->   w >= ceil(t)          w > t  ->   w >= floor(t) + 1
+    #   w <= t  ->  -w >= -floor(t)        w < t  ->  -w >= -(ceil(t) - 1)
+    #   w == t  ->  both w >= t and -w >= -t (two compiled columns)
+    # and all rules for a batch are then evaluated with one comparison.
+    def __init__(self, rules, question_ids):
+        question_index = {question_id: i for i, question_id in enumerate(question_ids)}
+        self.rules = tuple(dict(rule) for rule in rules)
+        # Validated below; .get so a missing message is reported as a bad rule
+        self.messages_list = tuple(rule.get("message") for rule in self.rules)
+        self.question_count = len(question_index)
+
+        columns = []
+        signs = []
+        thresholds = []
+        starts = []
+        for position, rule in enumerate(self.rules):
+            question_id = rule.get("question_id")
+            comparator = rule.get("comparator")
+            threshold = rule.get("threshold")
+            if question_id not in question_index:
+                raise ValueError(f"Insight rule {position}: unknown question id {question_id!r}")
+            if comparator not in COMPARATORS:
+                raise ValueError(f"Insight rule {position}: comparator must be one of {', '.join(COMPARATORS)}")
+            if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not math.isfinite(threshold):
+                raise ValueError(f"Insight rule {position}: threshold must be a finite number")
+            if not isinstance(rule.get("message"), str):
+                raise ValueError(f"Insight rule {position}: message must be a string")
+
+            column = question_index[question_id]
+            if comparator == ">=":
+                compiled = [(1, math.ceil(threshold))]
+            elif comparator == ">":
+                compiled = [(1, math.floor(threshold) + 1)]
+            elif comparator == "<=":
+                compiled = [(-1, -math.floor(threshold))]
+            elif comparator == "<":
+                compiled = [(-1, -(math.ceil(threshold) - 1))]
+            elif threshold == int(threshold):
+                compiled = [(1, int(threshold)), (-1, -int(threshold))]
+            else:
+                # An integer weight can never equal a fractional threshold
+                compiled = [(1, 1), (-1, -1), (0, 1)]
+
+            starts.append(len(columns))
+            for sign, bound in compiled:
+                columns.append(column)
+                signs.append(sign)
+                thresholds.append(min(max(bound, -BOUND_LIMIT), BOUND_LIMIT))
+
+        self.columns = np.array(columns, dtype=np.intp)
+        self.signs = np.array(signs, dtype=np.int16)
+        self.thresholds = np.array(thresholds, dtype=np.int16)
+        self.starts = np.array(starts, dtype=np.intp)
+        # Only "==" rules need more than one compiled column per rule
+        self.needs_reduce = len(self.columns) != len(self.rules)
+
+    @classmethod
+    def load(cls, question_ids, path=DEFAULT_RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), question_ids)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, weights):
+        # (N x questions) weights -> (N x rules) boolean flags
+        weights = np.asarray(weights)
+        if not len(self.rules):
+            return np.zeros((len(weights), 0), dtype=bool)
+        hits = weights[:, self.columns] * self.signs >= self.thresholds
+        if self.needs_reduce:
+            hits = np.logical_and.reduceat(hits, self.starts, axis=1)
+        return hits
+
+    def evaluate_packed(self, weights):
+        # Same as evaluate, packed 8 rules per byte (rule i is bit i % 8 of byte i // 8)
+        return np.packbits(self.evaluate(weights), axis=1, bitorder="little")
+
+    def unpack(self, packed):
+        return np.unpackbits(packed, axis=-1, count=len(self.rules), bitorder="little").astype(bool)
+
+    def evaluate_responses(self, responses, question_ids):
+        # One user's {question_id: weight}; unanswered questions count as 0
+        weights = np.zeros((1, self.question_count), dtype=np.int16)
+        for i, question_id in enumerate(question_ids):
+            weights[0, i] = responses.get(question_id, 0)
+        return self.evaluate(weights)[0]
+
+    def messages(self, flags):
+        return [message for message, flagged in zip(self.messages_list, flags) if flagged]
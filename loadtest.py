@@ -0,0 +1,182 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench import APP_PATH, format_seconds
+
+DEFAULT_OUTPUT = "loadtest_results.json"
+
+# Share of answers at each weight (1-5) when there is no stored cohort to copy
+DEFAULT_DISTRIBUTION = (0.15, 0.30, 0.30, 0.15, 0.10)
+
+# One student's visit: questionnaire, answer and submit, results rerun, reset
+STEPS = ("open", "submit", "results", "reset")
+
+# Logs "missing ScriptRunContext" for calls made outside a script run (bare mode)
+SCRIPT_RUN_CONTEXT_LOGGER = "streamlit.runtime.scriptrunner_utils.script_run_context"
+
+class BareModeWarningFilter(logging.Filter):
+    # A filter rather than a log level, because each AppTest run reapplies
+    # Streamlit's configured level to its loggers
+    def filter(self, record):
+        return "missing ScriptRunContext" not in record.getMessage()
+
+def response_distribution(db_path, question_count):
+    # (questions x 5) answer probabilities, taken from a results store's
+    # running totals when one is given
+    if db_path:
+        from aggregates import CohortAggregates
+        from store import QUESTION_IDS, connect_readonly
+        conn = connect_readonly(db_path)
+        histogram = CohortAggregates.load(conn, QUESTION_IDS, include_daily=False).question_histogram()
+        conn.close()
+        if histogram.sum():
+            histogram = histogram + 1.0
+            return histogram / histogram.sum(axis=1, keepdims=True)
+    return np.tile(DEFAULT_DISTRIBUTION, (question_count, 1))
+
+def rss_bytes():
+    # Current resident set size; falls back to the peak where /proc isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class Session:
+    def __init__(self, number, distribution, rng, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.app.query_params["user"] = f"loadtest{number}"
+        self.distribution = distribution
+        self.rng = rng
+        self.step = 0
+
+    @property
+    def done(self):
+        return self.step == len(STEPS)
+
+    def advance(self):
+        # Runs this session's next step and returns (step name, seconds)
+        name = STEPS[self.step]
+        app = self.app
+        if name == "submit":
+            weights = [self.rng.choice(5, p=p) + 1 for p in self.distribution]
+            for radio, weight in zip(app.radio, weights):
+                radio.set_value(radio.options[weight - 1])
+            app.button[0].click()
+        elif name == "reset":
+            app.sidebar.button[0].click()
+        started = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - started
+        if app.exception:
+            raise RuntimeError(f"Session {self.number} failed at {name}: {app.exception[0].message}")
+        if name == "submit" and not app.session_state.assessment_complete:
+            raise RuntimeError(f"Session {self.number} did not reach the results page")
+        self.step += 1
+        return name, elapsed
+
+def run_load(args):
+    # AppTest swaps in a process-wide mock runtime for each run, so reruns
+    # can't overlap on threads. Instead `concurrency` sessions are kept live
+    # at once and their reruns are interleaved in random order on one thread,
+    # which is what one worker's session state and caches see under load.
+    from youthwell import YouthWellBeingAssessment
+
+    distribution = response_distribution(args.db, len(YouthWellBeingAssessment().questions))
+    rng = np.random.default_rng(args.seed)
+
+    # One untimed visit first, so imports and cached resources are warm
+    warmup = Session(-1, distribution, rng, args.timeout)
+    while not warmup.done:
+        warmup.advance()
+    del warmup
+    baseline_rss = peak_rss = rss_bytes()
+
+    latencies = {name: [] for name in STEPS}
+    live = []
+    started_sessions = 0
+    started = time.perf_counter()
+    while live or started_sessions < args.sessions:
+        while len(live) < args.concurrency and started_sessions < args.sessions:
+            live.append(Session(started_sessions, distribution, rng, args.timeout))
+            started_sessions += 1
+        session = live[rng.integers(len(live))]
+        name, elapsed = session.advance()
+        latencies[name].append(elapsed)
+        if session.done:
+            live.remove(session)
+        if len(live) == args.concurrency:
+            peak_rss = max(peak_rss, rss_bytes())
+    wall = time.perf_counter() - started
+
+    all_latencies = np.concatenate([latencies[name] for name in STEPS])
+    return {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "wall_seconds": wall,
+        "sessions_per_second": args.sessions / wall,
+        "reruns_per_second": len(all_latencies) / wall,
+        "latency": {name: percentiles(values) for name, values in list(latencies.items()) + [("all", all_latencies)]},
+        "memory_per_session_bytes": max(peak_rss - baseline_rss, 0) / args.concurrency
+    }
+
+def percentiles(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": float(np.max(values)), "count": len(values)}
+
+def print_report(report):
+    print(f"{report['sessions']} sessions, {report['concurrency']} live at once, "
+          f"{report['wall_seconds']:.1f} s")
+    print(f"Throughput: {report['sessions_per_second']:.2f} sessions/s, {report['reruns_per_second']:.1f} reruns/s")
+    print(f"{'rerun':10s} {'p50':>10s} {'p95':>10s} {'p99':>10s} {'max':>10s}")
+    for name, stats in report["latency"].items():
+        print(f"{name:10s} " + " ".join(f"{format_seconds(stats[key]):>10s}" for key in ("p50", "p95", "p99", "max")))
+    print(f"Memory per live session: {report['memory_per_session_bytes'] / 1024:.0f} KiB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many student sessions against the app in-process")
+    parser.add_argument("--sessions", type=int, default=200, help="visits to simulate (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=20, help="sessions live at once (default: 20)")
+    parser.add_argument("--db", help="results store to copy the answer distribution from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"where to write results (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--max-p99", type=float, help="exit 1 if the overall p99 rerun latency exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    logging.getLogger(SCRIPT_RUN_CONTEXT_LOGGER).addFilter(BareModeWarningFilter())
+
+    # Keep simulated students out of the real results database and history
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["YOUTHWELL_DB_PATH"] = os.path.join(tmp, "loadtest_results.db")
+        os.environ["YOUTHWELL_HISTORY_DIR"] = os.path.join(tmp, "history")
+        report = run_load(args)
+
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.max_p99 is not None and report["latency"]["all"]["p99"] > args.max_p99:
+        print(f"p99 {format_seconds(report['latency']['all']['p99'])} is over {format_seconds(args.max_p99)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Per-section render latency. Off unless one of these is set:
+#   YOUTHWELL_METRICS_FILE  Prometheus text file, rewritten at most every
+#                           FILE_INTERVAL seconds and at exit (works with the
+#                           node_exporter textfile collector)
+#   YOUTHWELL_METRICS_PORT  serves the same text at http://127.0.0.1:<port>/metrics
+# When off, section() hands back one shared no-op context manager and nothing
+# is timed or stored.
+METRICS_FILE = os.environ.get("YOUTHWELL_METRICS_FILE")
+METRICS_PORT = os.environ.get("YOUTHWELL_METRICS_PORT")
+ENABLED = bool(METRICS_FILE or METRICS_PORT)
+
+FILE_INTERVAL = 5.0
+METRIC_NAME = "youthwell_section_seconds"
+
+# Upper bounds in seconds; one extra bucket counts everything slower
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+NULL_SECTION = nullcontext()
+
+logger = logging.getLogger(__name__)
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self, path=None):
+        self.path = path
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._next_write = time.monotonic() + FILE_INTERVAL
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+            # Only the thread that claims the interval writes the file
+            due = self.path is not None and time.monotonic() >= self._next_write
+            if due:
+                self._next_write = time.monotonic() + FILE_INTERVAL
+        if due:
+            try:
+                self.write()
+            except OSError:
+                # A metrics file problem must never fail the user's rerun
+                logger.warning("Could not write metrics to %s", self.path, exc_info=True)
+
+    def add_collector(self, collect):
+        # collect() returns extra exposition lines (e.g. cache counters) and is
+        # called each time the text is rendered
+        with self._lock:
+            self.collectors.append(collect)
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent rendering each named section of the YouthWell app",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        with self._lock:
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{section="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_NAME}_sum{{section="{name}"}} {histogram.total:.6f}')
+                lines.append(f'{METRIC_NAME}_count{{section="{name}"}} {histogram.count}')
+            collectors = list(self.collectors)
+        for collect in collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        # Write then rename, so a scraper never reads a half-written file;
+        # writers are serialized and each thread has its own temp file
+        path = path or self.path
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        text = self.prometheus_text()
+        with self._write_lock:
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+
+class Section:
+    # Times a with-block. name may be a callable, resolved when the block
+    # exits, for blocks whose label depends on what ran inside them.
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        registry.observe(self.name() if callable(self.name) else self.name, elapsed)
+
+registry = MetricsRegistry(METRICS_FILE)
+
+def section(name):
+    if not ENABLED:
+        return NULL_SECTION
+    return Section(name)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+# This module is imported once per process (Streamlit only re-executes the
+# app script), so the server and exit hook are set up once too
+if METRICS_PORT:
+    serve(METRICS_PORT)
+if METRICS_FILE:
+    atexit.register(registry.write)
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from content import DEFAULT_LANGUAGE, user_seed
+from youthwell import YouthWellBeingAssessment
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ContentPayloads:
+    # Everything in a response that depends only on the band is serialized once
+    # up front, and each insight message once per rule. Insight lists (keyed by
+    # the bit-packed rule flags) and content selections (keyed by band, weak
+    # categories, language and seed) are memoized, so a response is normally
+    # three lookups and a float format.
+    def __init__(self, assessment):
+        self.assessment = assessment
+        self.band_fragments = {}
+        for level in assessment.STRESS_LEVELS.tolist():
+            self.band_fragments[level] = json.dumps({
+                "stress_level": level,
+                "description": assessment.stress_descriptions[level]
+            })[1:-1].encode()
+
+        self.insight_rules = assessment.insight_rules
+        self.message_fragments = [json.dumps(message).encode() for message in self.insight_rules.messages_list]
+        self.insight_fragment = lru_cache(maxsize=4096)(self._insight_fragment)
+        self.content_fragment = lru_cache(maxsize=4096)(self._content_fragment)
+
+    def _content_fragment(self, stress_level, weak_categories, language, seed):
+        exercises, slokas = self.assessment.select_content(stress_level, weak_categories, seed, language)
+        return json.dumps({"exercises": exercises, "slokas": slokas})[1:-1].encode()
+
+    def _insight_fragment(self, packed_flags):
+        flags = self.insight_rules.unpack(np.frombuffer(packed_flags, dtype=np.uint8))
+        return b"[" + b",".join(fragment for fragment, flagged in zip(self.message_fragments, flags) if flagged) + b"]"
+
+    def render(self, stress_level, stress_percentage, packed_flags, weak_categories, language, seed):
+        return b"".join((
+            b'{"stress_percentage":', repr(stress_percentage).encode(), b",",
+            self.band_fragments[stress_level], b",",
+            self.content_fragment(stress_level, weak_categories, language, seed),
+            b',"insights":', self.insight_fragment(packed_flags), b"}"
+        ))
+
+class MicroBatcher:
+    # Requests that arrive within max_delay of each other are scored together
+    # with one call to the vectorized score_batch
+    def __init__(self, assessment, payloads, max_batch=256, max_delay=0.002):
+        self.assessment = assessment
+        self.payloads = payloads
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.scored = 0
+
+    async def score(self, request):
+        # request is the (weights, language, seed) tuple from parse_assessment_request
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                weights = np.array([request[0] for request, _ in batch], dtype=np.int8)
+                stress_levels, stress_percentages, flags = self.assessment.score_batch(weights)
+                packed_flags = np.packbits(flags, axis=1, bitorder="little")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                continue
+            for ((row, language, seed), future), level, percentage, packed in zip(
+                batch, stress_levels.tolist(), stress_percentages.tolist(), packed_flags
+            ):
+                if future.cancelled():
+                    continue
+                # A request whose content can't be rendered fails on its own
+                # (a 500) without taking the rest of the batch or this loop with it
+                try:
+                    weak_categories = self.assessment.weak_categories(row)
+                    payload = self.payloads.render(level, percentage, packed.tobytes(), weak_categories, language, seed)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(payload)
+            self.batches += 1
+            self.scored += len(batch)
+
+def parse_assessment_request(body, assessment):
+    # Accepts {"responses": {question_id: weight or option label}} plus an
+    # optional "user_id" (seeds content selection) and "language"
+    try:
+        request = json.loads(body)
+    except ValueError:
+        raise HTTPError(400, "Body must be JSON")
+    responses = request.get("responses") if isinstance(request, dict) else None
+    if not isinstance(responses, dict):
+        raise HTTPError(400, 'Expected {"responses": {question_id: answer}}')
+
+    missing = [question_id for question_id in assessment.question_ids if question_id not in responses]
+    if missing:
+        raise HTTPError(400, f"Missing answers for {', '.join(missing)}")
+    unknown = sorted(set(responses) - set(assessment.question_ids))
+    if unknown:
+        raise HTTPError(400, f"Unknown question ids {', '.join(unknown)}")
+
+    weights = []
+    for question in assessment.questions:
+        answer = responses[question.id]
+        if type(answer) is int and answer in question.option_by_weight:
+            weights.append(answer)
+        elif isinstance(answer, str) and answer in question.weight_by_option:
+            weights.append(question.weight_by_option[answer])
+        else:
+            raise HTTPError(400, f"Invalid answer {answer!r} for {question.id}")
+
+    language = request.get("language", DEFAULT_LANGUAGE)
+    if not isinstance(language, str):
+        raise HTTPError(400, "language must be a string")
+    user_id = request.get("user_id")
+    return weights, language, user_seed(user_id) if user_id is not None else 0
+
+class ScoringService:
+    def __init__(self, assessment=None, max_batch=256, max_delay=0.002):
+        self.assessment = assessment or YouthWellBeingAssessment()
+        self.payloads = ContentPayloads(self.assessment)
+        self.batcher = MicroBatcher(self.assessment, self.payloads, max_batch, max_delay)
+        self.batcher_task = None
+        self.questions_body = json.dumps([
+            {"id": question.id, "question": question.question, "options": dict(question.weight_by_option)}
+            for question in self.assessment.questions
+        ]).encode()
+
+    async def handle_request(self, method, path, body):
+        if path == "/assess":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            return await self.batcher.score(parse_assessment_request(body, self.assessment))
+        if path == "/questions" and method == "GET":
+            return self.questions_body
+        if path == "/health" and method == "GET":
+            return b'{"status":"ok"}'
+        raise HTTPError(404, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = 200, await self.handle_request(method, target.split("?", 1)[0], body)
+                except HTTPError as e:
+                    status, payload = e.status, json.dumps({"error": str(e)}).encode()
+                except ValueError:
+                    status, payload, keep_alive = 400, b'{"error":"Invalid Content-Length"}', False
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception:
+                    status, payload, keep_alive = 500, b'{"error":"Internal error"}', False
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def start_batcher(self):
+        self.batcher_task = asyncio.create_task(self.batcher.run())
+        self.batcher_task.add_done_callback(self._batcher_stopped)
+
+    def _batcher_stopped(self, task):
+        # run() never returns, so anything but cancellation is a crash; without
+        # a restart every later /assess would wait forever
+        if task.cancelled():
+            return
+        logger.error("Scoring batcher stopped; restarting it", exc_info=task.exception())
+        self.start_batcher()
+
+    async def serve(self, host, port):
+        self.start_batcher()
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"YouthWell scoring service listening on {addresses}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher_task.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless YouthWell scoring service (HTTP/JSON)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=256, help="most requests scored in one vectorized call")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0, help="how long a request may wait for others to batch with")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
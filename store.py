@@ -0,0 +1,266 @@
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from aggregates import AGGREGATE_SCHEMA, CohortAggregates
+
+DEFAULT_DB_PATH = "youthwell_results.db"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Several app workers and the export/load test tools share one database, so
+# connections wait this long for a lock before raising "database is locked"
+BUSY_TIMEOUT = 30.0
+# Seconds between attempts at a batch that failed to commit; the last delay repeats
+RETRY_DELAYS = (0.1, 0.5, 1.0, 2.0, 5.0)
+
+logger = logging.getLogger(__name__)
+
+# Same order as YouthWellBeingAssessment.questions. Columns are prefixed because
+# the stress_level question would otherwise clash with the stress_level result.
+QUESTION_IDS = (
+    "sleep_quality", "stress_level", "social_connection", "physical_activity",
+    "mood_stability", "concentration", "life_satisfaction", "anxiety_level"
+)
+RESPONSE_COLUMNS = tuple(f"response_{question_id}" for question_id in QUESTION_IDS)
+COLUMNS = ("date", "stress_level", "stress_percentage") + RESPONSE_COLUMNS + ("insights",)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    stress_level TEXT NOT NULL,
+    stress_percentage REAL NOT NULL,
+    {", ".join(f"{column} INTEGER NOT NULL" for column in RESPONSE_COLUMNS)},
+    insights TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_date ON results (date);
+CREATE INDEX IF NOT EXISTS idx_results_stress_level_date ON results (stress_level, date);
+"""
+
+def rebuild_aggregates(conn):
+    # One-off backfill for databases created before the aggregate tables existed
+    conn.execute(
+        "INSERT INTO agg_bands (stress_level, count) "
+        "SELECT stress_level, COUNT(*) FROM results GROUP BY stress_level"
+    )
+    conn.execute(
+        "INSERT INTO agg_daily (day, stress_level, count, total_percentage) "
+        "SELECT substr(date, 1, 10), stress_level, COUNT(*), SUM(stress_percentage) FROM results GROUP BY 1, 2"
+    )
+    for question_id, column in zip(QUESTION_IDS, RESPONSE_COLUMNS):
+        conn.execute(
+            f"INSERT INTO agg_weight_counts (question_id, weight, count) "
+            f"SELECT ?, {column}, COUNT(*) FROM results GROUP BY {column}",
+            (question_id,)
+        )
+    rebuild_score_counts(conn)
+
+def rebuild_score_counts(conn):
+    # Backfill for databases whose aggregates predate the total score histogram
+    conn.execute(
+        f"INSERT INTO agg_score_counts (score, count) "
+        f"SELECT {' + '.join(RESPONSE_COLUMNS)}, COUNT(*) FROM results GROUP BY 1"
+    )
+
+def format_date(value):
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+def summary_to_row(results_summary):
+    responses = results_summary["responses"]
+    return (
+        format_date(results_summary["date"]),
+        results_summary["stress_level"],
+        results_summary["stress_percentage"],
+        *(responses[question_id] for question_id in QUESTION_IDS),
+        json.dumps(results_summary["insights"])
+    )
+
+def row_to_summary(row):
+    # Inverse of summary_to_row, in the shape of the downloadable results JSON
+    date, stress_level, stress_percentage, *weights, insights = row
+    return {
+        "date": date,
+        "stress_level": stress_level,
+        "stress_percentage": stress_percentage,
+        "responses": dict(zip(QUESTION_IDS, weights)),
+        "insights": json.loads(insights)
+    }
+
+def where_clause(start=None, end=None, stress_level=None):
+    # start is inclusive, end exclusive; both hit idx_results_date or, with a
+    # stress level, idx_results_stress_level_date
+    conditions = []
+    params = []
+    if stress_level is not None:
+        conditions.append("stress_level = ?")
+        params.append(stress_level)
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(format_date(start))
+    if end is not None:
+        conditions.append("date < ?")
+        params.append(format_date(end))
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+def connect_readonly(path, busy_timeout=BUSY_TIMEOUT):
+    # For tools that only read (exports, the load test): no writer thread, no
+    # exit hook and no schema changes, and sqlite refuses any write
+    if not Path(path).exists():
+        raise FileNotFoundError(f"No results database at {path}")
+    return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, timeout=busy_timeout)
+
+def iter_rows(conn, start=None, end=None, stress_level=None, chunk_size=10000):
+    # Yields lists of raw rows (COLUMNS order) in date order without loading the whole result
+    where, params = where_clause(start, end, stress_level)
+    cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM results{where} ORDER BY date", params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+class ResultsStore:
+    # SQLite (WAL) store of completed results summaries. record() only enqueues;
+    # a background thread writes queued rows in batched transactions.
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=500, busy_timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._closed = False
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA + AGGREGATE_SCHEMA)
+            has_aggregates = conn.execute("SELECT EXISTS (SELECT 1 FROM agg_bands)").fetchone()[0]
+            has_results = conn.execute("SELECT EXISTS (SELECT 1 FROM results)").fetchone()[0]
+            has_score_counts = conn.execute("SELECT EXISTS (SELECT 1 FROM agg_score_counts)").fetchone()[0]
+            if has_results and not has_aggregates:
+                rebuild_aggregates(conn)
+            elif has_results and not has_score_counts:
+                rebuild_score_counts(conn)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name="results-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, results_summary):
+        # Never blocks on disk; the row is converted now so later mutation of
+        # the caller's dicts can't leak into the stored record
+        self._queue.put(summary_to_row(results_summary))
+
+    def flush(self):
+        # Wait until everything recorded so far is committed
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        return conn
+
+    def _write_loop(self):
+        # Only the None sentinel from close() ends this loop; a batch that
+        # fails is retried or logged and dropped, so record() never queues
+        # into a dead thread
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        stopping = False
+        while not stopping:
+            # Block for the first row, then take whatever else is already queued
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            stopping = len(rows) != len(batch)
+            try:
+                if rows:
+                    self._write_batch(conn, rows)
+            except Exception:
+                # Errors a retry can't fix, and operational errors still failing
+                # after the last retry while closing
+                logger.exception("Dropped %d results that could not be stored", len(rows))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def _write_batch(self, conn, rows):
+        insert = f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        aggregates = CohortAggregates(QUESTION_IDS)
+        for row in rows:
+            aggregates.add(row[0], row[1], row[2], row[3:3 + len(QUESTION_IDS)])
+        attempt = 0
+        while True:
+            try:
+                with conn:
+                    conn.executemany(insert, rows)
+                    aggregates.save(conn)
+                return
+            except sqlite3.OperationalError as e:
+                # Locked or busy database, full disk and the like may clear up;
+                # integrity and programming errors won't, so they propagate.
+                # Once closing, stop after one round of retries rather than hang exit
+                if self._closed and attempt >= len(RETRY_DELAYS):
+                    raise
+                delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
+                logger.warning("Storing %d results failed (%s); retrying in %.1fs", len(rows), e, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across threads, so readers get one each
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def cohort_aggregates(self, include_daily=True):
+        # Reads only the aggregate tables, whatever the number of results
+        return CohortAggregates.load(self._connection(), QUESTION_IDS, include_daily)
+
+    def count(self, start=None, end=None, stress_level=None):
+        where, params = where_clause(start, end, stress_level)
+        return self._connection().execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def band_counts(self, start=None, end=None):
+        where, params = where_clause(start, end)
+        rows = self._connection().execute(
+            f"SELECT stress_level, COUNT(*) FROM results{where} GROUP BY stress_level", params
+        )
+        return dict(rows.fetchall())
+
+    def iter_rows(self, start=None, end=None, stress_level=None, chunk_size=10000):
+        return iter_rows(self._connection(), start, end, stress_level, chunk_size)
+
+    def results(self, start=None, end=None, stress_level=None, limit=None):
+        # Results summaries in date order, most useful with a range, band or limit
+        where, params = where_clause(start, end, stress_level)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM results{where} ORDER BY date"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for row in self._connection().execute(sql, params):
+            yield row_to_summary(row)
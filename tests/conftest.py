@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app is a set of top-level modules, not a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture(scope="session")
+def assessment():
+    from youthwell import YouthWellBeingAssessment
+    return YouthWellBeingAssessment()
@@ -0,0 +1,97 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from aggregates import CohortAggregates
+from store import QUESTION_IDS, RESPONSE_COLUMNS, ResultsStore
+
+@pytest.fixture
+def weights():
+    return np.random.default_rng(0).integers(1, 6, size=(500, len(QUESTION_IDS)))
+
+@pytest.fixture
+def db_path(tmp_path, assessment, weights):
+    path = tmp_path / "results.db"
+    store = ResultsStore(str(path), batch_size=64)
+    start = datetime(2026, 1, 1, 9)
+    for i, row in enumerate(weights):
+        responses = dict(zip(QUESTION_IDS, row.tolist()))
+        store.record(assessment.build_results_summary(responses, start + timedelta(hours=7 * i)))
+    store.close()
+    return str(path)
+
+def grouped(conn):
+    # The aggregates recomputed from scratch over the results table
+    weight_counts = {
+        (question_id, weight): count
+        for question_id, column in zip(QUESTION_IDS, RESPONSE_COLUMNS)
+        for weight, count in conn.execute(f"SELECT {column}, COUNT(*) FROM results GROUP BY 1")
+    }
+    scores = dict(conn.execute(f"SELECT {' + '.join(RESPONSE_COLUMNS)}, COUNT(*) FROM results GROUP BY 1"))
+    bands = dict(conn.execute("SELECT stress_level, COUNT(*) FROM results GROUP BY 1"))
+    daily = {
+        (day, stress_level): (count, total)
+        for day, stress_level, count, total in conn.execute(
+            "SELECT substr(date, 1, 10), stress_level, COUNT(*), SUM(stress_percentage) FROM results GROUP BY 1, 2"
+        )
+    }
+    return weight_counts, scores, bands, daily
+
+def assert_matches(aggregates, conn):
+    weight_counts, scores, bands, daily = grouped(conn)
+    assert {
+        (question_id, weight): int(aggregates.weight_counts[i, weight])
+        for i, question_id in enumerate(QUESTION_IDS)
+        for weight in np.nonzero(aggregates.weight_counts[i])[0]
+    } == weight_counts
+    assert {int(score): int(aggregates.score_counts[score]) for score in np.nonzero(aggregates.score_counts)[0]} == scores
+    assert {level: count for level, count in aggregates.band_counts.items() if count} == bands
+    assert aggregates.daily.keys() == daily.keys()
+    for key, (count, total) in daily.items():
+        assert aggregates.daily[key][0] == count
+        assert aggregates.daily[key][1] == pytest.approx(total)
+
+def test_incremental_aggregates_match_group_by(db_path):
+    conn = sqlite3.connect(db_path)
+    assert_matches(CohortAggregates.load(conn, QUESTION_IDS), conn)
+
+def test_backfill_matches_group_by(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        for table in ("agg_weight_counts", "agg_score_counts", "agg_bands", "agg_daily"):
+            conn.execute(f"DELETE FROM {table}")
+    ResultsStore(db_path).close()
+    assert_matches(CohortAggregates.load(conn, QUESTION_IDS), conn)
+
+def test_merge_equals_single_pass(weights):
+    whole = CohortAggregates(QUESTION_IDS)
+    parts = [CohortAggregates(QUESTION_IDS), CohortAggregates(QUESTION_IDS)]
+    for i, row in enumerate(weights):
+        date = f"2026-01-{1 + i % 3:02d} 10:00:00"
+        for aggregates in (whole, parts[i % 2]):
+            aggregates.add(date, "low_stress", float(row.sum()), row)
+    merged = parts[0].merge(parts[1])
+    assert np.array_equal(merged.weight_counts, whole.weight_counts)
+    assert np.array_equal(merged.score_counts, whole.score_counts)
+    assert merged.band_counts == whole.band_counts
+    assert merged.daily == whole.daily
+
+def test_percentiles_match_brute_force(weights):
+    aggregates = CohortAggregates(QUESTION_IDS)
+    for row in weights:
+        aggregates.add("2026-01-01 10:00:00", "low_stress", 0.0, row)
+    totals = weights.sum(axis=1)
+    for row in weights[:20]:
+        total = row.sum()
+        expected = ((totals < total).sum() + (totals == total).sum() / 2) * 100 / len(weights)
+        assert aggregates.score_percentile(row) == pytest.approx(expected)
+        expected_categories = [
+            ((weights[:, i] < weight).sum() + (weights[:, i] == weight).sum() / 2) * 100 / len(weights)
+            for i, weight in enumerate(row)
+        ]
+        assert aggregates.category_percentiles(row) == pytest.approx(expected_categories)
+
+def test_percentiles_of_empty_cohort_are_zero():
+    assert CohortAggregates(QUESTION_IDS).score_percentile([3] * len(QUESTION_IDS)) == 0.0
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import content
+from content import DEFAULT_LANGUAGE, ContentCatalog, build_index, index_key
+
+TAG_FIELDS = ("kind", "bands", "categories", "language")
+
+@pytest.fixture
+def source_items():
+    with open(content.SOURCE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.idx"
+    build_index(content.SOURCE_PATH, path)
+    catalog = ContentCatalog(path)
+    yield catalog
+    catalog.close()
+
+def expected_postings(items):
+    postings = {}
+    for record_id, item in enumerate(items):
+        for band in item["bands"]:
+            for category in list(item.get("categories", [])) + ["*"]:
+                key = index_key(item["kind"], band, item.get("language", DEFAULT_LANGUAGE), category)
+                postings.setdefault(key, []).append(record_id)
+    return postings
+
+def test_round_trip(catalog, source_items):
+    assert catalog.record_count == len(source_items)
+    for record_id, item in enumerate(source_items):
+        assert catalog.record(record_id) == {key: value for key, value in item.items() if key not in TAG_FIELDS}
+    postings = expected_postings(source_items)
+    assert set(catalog.keys) == set(postings)
+    for key, record_ids in postings.items():
+        kind, band, language, category = key.split("/")
+        assert catalog.postings(kind, band, language, category).tolist() == record_ids
+
+def test_select_puts_matching_categories_first(catalog, source_items):
+    band = source_items[0]["bands"][0]
+    category = source_items[0]["categories"][0]
+    matching = [
+        item["text"] for item in source_items
+        if item["kind"] == "exercise" and band in item["bands"] and category in item["categories"]
+    ]
+    picked = [record["text"] for record in catalog.select("exercise", band, (category,), seed=7, limit=len(matching) + 1)]
+    assert sorted(picked[:len(matching)]) == sorted(matching)
+    assert len(set(picked)) == len(picked)
+
+def test_select_is_deterministic_per_seed(catalog):
+    first = catalog.select("sloka", "high_stress", ("anxiety",), seed=42, limit=3)
+    assert catalog.select("sloka", "high_stress", ("anxiety",), seed=42, limit=3) == first
+    assert len(first) == 3
+
+def test_unknown_language_falls_back_to_default(catalog):
+    assert catalog.select("exercise", "low_stress", language="xx", seed=1) == catalog.select("exercise", "low_stress", seed=1)
+
+def test_shipped_index_matches_source():
+    catalog = ContentCatalog.open()
+    assert catalog.path == content.INDEX_PATH
+    assert catalog.source_sha256 == content.source_hash()
+    catalog.close()
+
+def test_open_does_not_hash_an_unchanged_source(monkeypatch):
+    def fail(source):
+        raise AssertionError("source was read")
+    monkeypatch.setattr(content, "source_hash", fail)
+    catalog = ContentCatalog.open()
+    assert catalog.path == content.INDEX_PATH
+    catalog.close()
+
+def test_changed_source_builds_in_cache_dir(tmp_path, monkeypatch, source_items):
+    monkeypatch.setattr(content, "CACHE_DIR", tmp_path / "cache")
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps(source_items[:-1]), encoding="utf-8")
+    catalog = ContentCatalog.open(source)
+    assert catalog.path.parent == tmp_path / "cache"
+    assert catalog.record_count == len(source_items) - 1
+    catalog.close()
@@ -0,0 +1,36 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from history import HistoryStore, summarize
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history"))
+
+def test_plain_user_ids_name_the_file(store):
+    assert os.path.basename(store.path("loadtest_7-a")) == "loadtest_7-a.bin"
+
+@pytest.mark.parametrize("user_id", ["abc\n", "../abc", "a/b", "", "x" * 65, "ab c", "é"])
+def test_other_user_ids_are_hashed(store, user_id):
+    name = os.path.basename(store.path(user_id))
+    assert name.startswith("sha256=") and name.endswith(".bin")
+    assert os.path.dirname(store.path(user_id)) == store.directory
+
+def test_trailing_newline_is_not_a_plain_id(store):
+    assert store.path("abc\n") != store.path("abc")
+
+def test_append_and_summarize(store, assessment):
+    started = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+    for day, weight in enumerate((1, 3, 5, 5)):
+        store.append("abc", started + timedelta(days=day), [weight] * len(assessment.questions))
+    records = store.load("abc")
+    assert records["timestamp"].tolist() == [int((started + timedelta(days=day)).timestamp()) for day in range(4)]
+
+    trend = summarize(records, assessment)
+    assert trend["stress_levels"].tolist() == ["low_stress", "medium_stress", "high_stress", "high_stress"]
+    assert trend["band_changes"] == 2
+    assert trend["category_deltas"].tolist() == [0] * len(assessment.questions)
+    np.testing.assert_allclose(trend["stress_percentages"], [20, 60, 100, 100])
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import ingest
+from ingest import ingest as run_ingest
+
+def make_summaries(assessment, count):
+    rng = np.random.default_rng(3)
+    summaries = []
+    for i in range(count):
+        responses = {question_id: int(rng.integers(1, 6)) for question_id in assessment.question_ids}
+        summaries.append(assessment.build_results_summary(responses, datetime(2024, 1, 1 + i % 28, 9, i % 60)))
+    return summaries
+
+def write_jsonl(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return path
+
+@pytest.fixture
+def summaries(assessment):
+    return make_summaries(assessment, 40)
+
+@pytest.fixture
+def source(tmp_path, summaries):
+    lines = [json.dumps(summary) for summary in summaries]
+    # Invalid records: deeply nested JSON (RecursionError), bad JSON, a bad weight
+    lines[5:5] = ["[" * 100000 + "]" * 100000, "{not json", json.dumps({**summaries[0], "responses": {}})]
+    return write_jsonl(tmp_path / "results.jsonl", lines)
+
+def expected_columns(assessment, summaries):
+    weights = np.array([[summary["responses"][question_id] for question_id in assessment.question_ids] for summary in summaries])
+    levels, percentages = assessment.calculate_stress_levels(weights)
+    return {
+        "date": np.array([summary["date"] for summary in summaries], dtype="datetime64[s]"),
+        "weights": weights,
+        "stress_percentage": percentages,
+        "stress_level": [summary["stress_level"] for summary in summaries]
+    }
+
+def test_npz_round_trip(tmp_path, assessment, source, summaries):
+    output = tmp_path / "results.npz"
+    stats = run_ingest(str(source), str(output), workers=1, chunk_size=16)
+    assert (stats["records"], stats["invalid"]) == (len(summaries), 3)
+
+    expected = expected_columns(assessment, summaries)
+    with np.load(output) as data:
+        assert data["question_ids"].tolist() == list(assessment.question_ids)
+        np.testing.assert_array_equal(data["date"], expected["date"])
+        np.testing.assert_array_equal(data["weights"], expected["weights"])
+        np.testing.assert_allclose(data["stress_percentage"], expected["stress_percentage"])
+        assert data["stress_levels"][data["stress_level"]].tolist() == expected["stress_level"]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+def test_parquet_round_trip(tmp_path, assessment, source, summaries):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = tmp_path / "results.parquet"
+    stats = run_ingest(str(source), str(output), workers=1, chunk_size=16)
+    assert (stats["records"], stats["invalid"]) == (len(summaries), 3)
+
+    expected = expected_columns(assessment, summaries)
+    table = pq.read_table(output)
+    assert table.column_names == ingest.flat_column_names(assessment.question_ids)
+    np.testing.assert_array_equal(table["date"].to_numpy(), expected["date"])
+    for i, question_id in enumerate(assessment.question_ids):
+        assert table[f"responses.{question_id}"].to_pylist() == expected["weights"][:, i].tolist()
+    np.testing.assert_allclose(table["stress_percentage"].to_numpy(), expected["stress_percentage"])
+    assert table["stress_level"].to_pylist() == expected["stress_level"]
+
+def test_npz_with_no_valid_records(tmp_path, assessment):
+    source = write_jsonl(tmp_path / "results.jsonl", ["{not json"])
+    output = tmp_path / "results.npz"
+    stats = run_ingest(str(source), str(output), workers=1)
+    assert (stats["records"], stats["invalid"]) == (0, 1)
+    with np.load(output) as data:
+        assert data["date"].shape == (0,)
+        assert data["weights"].shape == (0, len(assessment.question_ids))
+
+@pytest.mark.parametrize("suffix", [".npz", ".parquet"])
+def test_failed_import_leaves_no_files(tmp_path, monkeypatch, source, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow.parquet")
+    writer_class = ingest.NpzWriter if suffix == ".npz" else ingest.ParquetWriter
+
+    def fail(self, chunk):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(writer_class, "write", fail)
+
+    with pytest.raises(RuntimeError):
+        run_ingest(str(source), str(tmp_path / f"results{suffix}"), workers=1)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["results.jsonl"]
@@ -0,0 +1,68 @@
+import operator
+
+import numpy as np
+import pytest
+
+from insights import COMPARATORS, DEFAULT_RULES_PATH, InsightRules
+
+OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt, "==": operator.eq}
+QUESTION_IDS = ("a", "b")
+# Past both ends of the 1-5 range, so bounds that clip are covered too
+WEIGHTS = np.arange(-1, 8)
+
+def rule(comparator, threshold, question_id="a"):
+    return {"question_id": question_id, "comparator": comparator, "threshold": threshold, "message": f"{question_id} {comparator} {threshold}"}
+
+def weight_rows(column_a, column_b=None):
+    column_b = np.zeros_like(column_a) if column_b is None else column_b
+    return np.stack([column_a, column_b], axis=1)
+
+@pytest.mark.parametrize("comparator", COMPARATORS)
+@pytest.mark.parametrize("threshold", [-1, 0, 1, 3, 5, 7, 2.5, 3.0, -0.5, 4.999, 5.001, 40000, -40000, 1e300, 127.5, -128])
+def test_comparator_matches_python(comparator, threshold):
+    rules = InsightRules([rule(comparator, threshold)], QUESTION_IDS)
+    flags = rules.evaluate(weight_rows(WEIGHTS))
+    assert flags[:, 0].tolist() == [OPERATORS[comparator](int(weight), threshold) for weight in WEIGHTS]
+
+def test_mixed_table_matches_python():
+    # Equality rules compile to several columns; the rules around them must stay aligned
+    rng = np.random.default_rng(0)
+    table = [
+        rule(comparator, float(rng.choice([2, 3, 3.5, 4])), question_id)
+        for comparator in COMPARATORS for question_id in QUESTION_IDS
+    ] + [rule("==", 4, "b"), rule("==", 2.5, "a"), rule("<", 3)]
+    rules = InsightRules(table, QUESTION_IDS)
+    a, b = np.meshgrid(np.arange(1, 6), np.arange(1, 6))
+    weights = weight_rows(a.ravel(), b.ravel())
+    flags = rules.evaluate(weights)
+    for row, row_flags in zip(weights, flags):
+        values = dict(zip(QUESTION_IDS, row.tolist()))
+        expected = [OPERATORS[r["comparator"]](values[r["question_id"]], r["threshold"]) for r in table]
+        assert row_flags.tolist() == expected
+    assert np.array_equal(rules.unpack(rules.evaluate_packed(weights)), flags)
+
+def test_evaluate_responses_treats_missing_answers_as_zero():
+    rules = InsightRules([rule("<", 1), rule(">=", 3, "b")], QUESTION_IDS)
+    assert rules.evaluate_responses({"b": 4}, QUESTION_IDS).tolist() == [True, True]
+
+def test_empty_table():
+    rules = InsightRules([], QUESTION_IDS)
+    assert rules.evaluate(weight_rows(WEIGHTS)).shape == (len(WEIGHTS), 0)
+
+@pytest.mark.parametrize("bad_rule", [
+    rule(">=", 3, "missing"),
+    rule("=>", 3),
+    rule(">=", "3"),
+    rule(">=", True),
+    rule("<=", float("inf")),
+    rule(">", float("-inf")),
+    rule("==", float("nan")),
+    {"question_id": "a", "comparator": ">=", "threshold": 3}
+])
+def test_invalid_rules_are_rejected(bad_rule):
+    with pytest.raises(ValueError):
+        InsightRules([bad_rule], QUESTION_IDS)
+
+def test_shipped_rules_load(assessment):
+    rules = InsightRules.load(assessment.question_ids, DEFAULT_RULES_PATH)
+    assert len(rules) == len(rules.messages_list) > 0
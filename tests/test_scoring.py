@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+def responses_for(assessment, weights):
+    return dict(zip(assessment.question_ids, (int(weight) for weight in weights)))
+
+def vector_with_total(total, question_count=8):
+    # Weights 1-5 in question order adding up to total
+    weights = [1] * question_count
+    remaining = total - question_count
+    for i in range(question_count):
+        step = min(4, remaining)
+        weights[i] += step
+        remaining -= step
+    return weights
+
+def test_every_total_matches_per_user(assessment):
+    totals = range(8, 41)
+    weights = np.array([vector_with_total(total) for total in totals], dtype=np.int8)
+    levels, percentages = assessment.calculate_stress_levels(weights)
+    for row, level, percentage in zip(weights, levels, percentages):
+        expected_level, expected_percentage, _ = assessment.calculate_stress_level(responses_for(assessment, row))
+        assert level == expected_level
+        assert percentage == expected_percentage
+
+@pytest.mark.parametrize("total, level", [
+    (16, "low_stress"), (17, "medium_stress"), (28, "medium_stress"), (29, "high_stress")
+])
+def test_band_boundaries(assessment, total, level):
+    # 16/40 is exactly 40% and 28/40 exactly 70%; both bands include their upper bound
+    weights = np.array([vector_with_total(total)], dtype=np.int8)
+    levels, _ = assessment.calculate_stress_levels(weights)
+    assert levels[0] == level
+    assert assessment.calculate_stress_level(responses_for(assessment, weights[0]))[0] == level
+
+def test_score_batch_matches_per_user(assessment):
+    weights = np.random.default_rng(0).integers(1, 6, size=(2000, len(assessment.questions)), dtype=np.int8)
+    levels, percentages, flags = assessment.score_batch(weights)
+    for row, level, percentage, row_flags in zip(weights, levels, percentages, flags):
+        responses = responses_for(assessment, row)
+        assert (level, percentage) == assessment.calculate_stress_level(responses)[:2]
+        assert assessment.insights_from_flags(row_flags) == assessment.generate_insights(responses)
+
+def test_weight_matrix_rejects_wrong_shape(assessment):
+    with pytest.raises(ValueError):
+        assessment.calculate_stress_levels(np.ones((3, 5), dtype=np.int8))
@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+
+from content import DEFAULT_LANGUAGE, user_seed
+from service import HTTPError, ScoringService, parse_assessment_request
+
+def body(responses, **fields):
+    return json.dumps({"responses": responses, **fields}).encode()
+
+def all_answers(assessment, weight=3):
+    return {question_id: weight for question_id in assessment.question_ids}
+
+def test_parse_accepts_weights_and_labels(assessment):
+    responses = all_answers(assessment)
+    first = assessment.questions[0]
+    responses[first.id] = first.option_by_weight[5]
+    weights, language, seed = parse_assessment_request(body(responses, user_id="abc", language="hi"), assessment)
+    assert weights == [5] + [3] * (len(assessment.questions) - 1)
+    assert (language, seed) == ("hi", user_seed("abc"))
+
+def test_parse_defaults(assessment):
+    _, language, seed = parse_assessment_request(body(all_answers(assessment)), assessment)
+    assert (language, seed) == (DEFAULT_LANGUAGE, 0)
+
+@pytest.mark.parametrize("make_body, message", [
+    (lambda a: b"{not json", "Body must be JSON"),
+    (lambda a: b"[]", "Expected"),
+    (lambda a: body({}), "Missing answers"),
+    (lambda a: body({**all_answers(a), "extra": 1}), "Unknown question ids extra"),
+    (lambda a: body({**all_answers(a), a.question_ids[0]: 9}), "Invalid answer 9"),
+    (lambda a: body({**all_answers(a), a.question_ids[0]: True}), "Invalid answer True"),
+    (lambda a: body({**all_answers(a), a.question_ids[0]: "Maybe"}), "Invalid answer 'Maybe'"),
+    (lambda a: body(all_answers(a), language=1), "language must be a string")
+])
+def test_parse_rejects(assessment, make_body, message):
+    with pytest.raises(HTTPError) as e:
+        parse_assessment_request(make_body(assessment), assessment)
+    assert e.value.status == 400
+    assert message in str(e.value)
+
+def score_all(service, requests):
+    async def run():
+        service.start_batcher()
+        try:
+            return await asyncio.gather(*(service.batcher.score(request) for request in requests), return_exceptions=True)
+        finally:
+            service.batcher_task.cancel()
+    return asyncio.run(run())
+
+def test_concurrent_requests_share_a_batch(assessment):
+    service = ScoringService(assessment, max_delay=0.05)
+    requests = [([weight] * len(assessment.questions), DEFAULT_LANGUAGE, seed) for seed, weight in enumerate((1, 3, 5))]
+    payloads = score_all(service, requests)
+    assert (service.batcher.batches, service.batcher.scored) == (1, 3)
+    for (weights, _, _), payload in zip(requests, payloads):
+        level, percentage, _ = assessment.calculate_stress_level(dict(zip(assessment.question_ids, weights)))
+        result = json.loads(payload)
+        assert (result["stress_level"], result["stress_percentage"]) == (level, percentage)
+
+def test_render_failure_fails_only_that_request(assessment, monkeypatch):
+    service = ScoringService(assessment, max_delay=0.05)
+    render = service.payloads.render
+
+    def render_or_fail(*args):
+        if args[-1] == 1:
+            raise KeyError("missing content")
+        return render(*args)
+    monkeypatch.setattr(service.payloads, "render", render_or_fail)
+
+    weights = [3] * len(assessment.questions)
+    payloads = score_all(service, [(weights, DEFAULT_LANGUAGE, seed) for seed in range(3)])
+    assert isinstance(payloads[1], KeyError)
+    assert [json.loads(payloads[i])["stress_level"] for i in (0, 2)] == ["medium_stress"] * 2
+
+def test_crashed_batcher_is_restarted(assessment, monkeypatch):
+    service = ScoringService(assessment)
+    run = service.batcher.run
+    runs = []
+
+    async def crash_once():
+        runs.append(1)
+        if len(runs) == 1:
+            raise RuntimeError("batcher bug")
+        await run()
+    monkeypatch.setattr(service.batcher, "run", crash_once)
+
+    payloads = score_all(service, [([3] * len(assessment.questions), DEFAULT_LANGUAGE, 0)])
+    assert len(runs) == 2
+    assert json.loads(payloads[0])["stress_level"] == "medium_stress"
+
+def test_render_failure_returns_500_and_keeps_serving(assessment, monkeypatch):
+    service = ScoringService(assessment)
+    render = service.payloads.render
+    failures = [KeyError("missing content")]
+
+    def render_or_fail(*args):
+        if failures:
+            raise failures.pop()
+        return render(*args)
+    monkeypatch.setattr(service.payloads, "render", render_or_fail)
+
+    async def post(port, payload):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /assess HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(payload) + payload)
+        status = int((await reader.readline()).split()[1])
+        headers = (await reader.readuntil(b"\r\n\r\n")).decode().lower()
+        length = int(headers.split("content-length:")[1].split("\r\n")[0])
+        response = await reader.readexactly(length)
+        writer.close()
+        return status, json.loads(response)
+
+    async def run():
+        service.start_batcher()
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            payload = body(all_answers(assessment))
+            return [await post(port, payload) for _ in range(2)]
+        finally:
+            server.close()
+            service.batcher_task.cancel()
+
+    (first_status, first), (second_status, second) = asyncio.run(run())
+    assert (first_status, first) == (500, {"error": "Internal error"})
+    assert second_status == 200
+    assert second["stress_level"] == "medium_stress"
@@ -1,23 +1,25 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 from datetime import datetime
-import plotly.express as px
-
-import plotly.graph_objects as go
+import functools
 import json
-import random
+import os
+import uuid
+from collections import namedtuple
+from types import MappingProxyType
 
-# Configure Streamlit page
-st.set_page_config(
-    page_title="YouthWell - Mental Health Assessment",
-    page_icon="🧘",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# figures loads Plotly on first use and store is plain sqlite3, so the
+# questionnaire page never pays for the charting stack or pandas
+import figures
+import fragments
+import history
+import metrics
+import store
+from insights import DEFAULT_RULES_PATH, InsightRules
+from content import DEFAULT_LANGUAGE, ContentCatalog, user_seed
 
 # Custom CSS for better styling
-st.markdown("""
+PAGE_CSS = """
 <style>
 .main-header {
     font-size: 3em;
@@ -54,182 +56,350 @@ st.markdown("""
     border: 2px solid #DAA520;
     font-style: italic;
 }
+.suggestion-grid {
+    display: grid;
+    grid-template-columns: repeat(2, minmax(0, 1fr));
+    column-gap: 1rem;
+}
 .stress-high { color: #DC143C; font-weight: bold; }
 .stress-medium { color: #FF8C00; font-weight: bold; }
 .stress-low { color: #32CD32; font-weight: bold; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def configure_page():
+    # Configure Streamlit page
+    st.set_page_config(
+        page_title="YouthWell - Mental Health Assessment",
+        page_icon="🧘",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+# Immutable question record with precomputed lookups in both directions
+Question = namedtuple("Question", [
+    "id", "category", "question", "options", "weights",
+    "weight_by_option", "option_by_weight", "index_by_weight"
+])
+
+def build_question(id, category, question, options, weights):
+    options = tuple(options)
+    weights = tuple(weights)
+    return Question(
+        id=id,
+        category=category,
+        question=question,
+        options=options,
+        weights=weights,
+        weight_by_option=MappingProxyType(dict(zip(options, weights))),
+        option_by_weight=MappingProxyType(dict(zip(weights, options))),
+        index_by_weight=MappingProxyType({weight: i for i, weight in enumerate(weights)})
+    )
 
 class YouthWellBeingAssessment:
-    def __init__(self):
+    # Stress bands: <= 40% is low, <= 70% is moderate, anything above is high
+    LOW_STRESS_MAX = 40
+    MEDIUM_STRESS_MAX = 70
+    STRESS_LEVELS = np.array(["low_stress", "medium_stress", "high_stress"])
+    
+    # Categories answered with weight 4 or 5 steer exercise and sloka selection
+    WEAK_WEIGHT = 4
+    EXERCISE_LIMIT = 6
+    SLOKA_LIMIT = 3
+    
+    # Smallest number of stored results before percentile ranks are shown
+    COMPARISON_MIN_COHORT = 10
+    
+    def __init__(self, insight_rules_path=DEFAULT_RULES_PATH):
         # Mental health assessment questions
-        self.questions = [
+        questions = [
             {
                 "id": "sleep_quality",
+                "category": "sleep",
                 "question": "How would you rate your sleep quality over the past week?",
                 "options": ["Excellent", "Good", "Fair", "Poor", "Very Poor"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "stress_level",
+                "category": "stress",
                 "question": "How often do you feel overwhelmed or stressed?",
                 "options": ["Never", "Rarely", "Sometimes", "Often", "Always"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "social_connection",
+                "category": "social",
                 "question": "How satisfied are you with your social relationships?",
                 "options": ["Very Satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very Dissatisfied"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "physical_activity",
+                "category": "physical",
                 "question": "How often do you engage in physical exercise?",
                 "options": ["Daily", "4-6 times/week", "2-3 times/week", "Once a week", "Never"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "mood_stability",
+                "category": "mood",
                 "question": "How stable has your mood been lately?",
                 "options": ["Very Stable", "Mostly Stable", "Somewhat Variable", "Often Variable", "Very Variable"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "concentration",
+                "category": "focus",
                 "question": "How is your ability to focus and concentrate?",
                 "options": ["Excellent", "Good", "Average", "Poor", "Very Poor"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "life_satisfaction",
+                "category": "life",
                 "question": "How satisfied are you with your life currently?",
                 "options": ["Very Satisfied", "Satisfied", "Neutral", "Dissatisfied", "Very Dissatisfied"],
                 "weights": [1, 2, 3, 4, 5]
             },
             {
                 "id": "anxiety_level",
+                "category": "anxiety",
                 "question": "How often do you experience anxiety or worry?",
                 "options": ["Never", "Rarely", "Sometimes", "Often", "Always"],
                 "weights": [1, 2, 3, 4, 5]
             }
         ]
+        self.questions = tuple(build_question(**question) for question in questions)
+        self.question_ids = tuple(question.id for question in self.questions)
         
-        # Exercise suggestions based on stress levels
-        self.exercises = {
-            "low_stress": [
-                "🚶‍♀️ **Morning Walk (15-20 mins)**: Start your day with a gentle walk in nature",
-                "🧘‍♀️ **Mindful Breathing (5 mins)**: Practice deep breathing exercises",
-                "🤸‍♀️ **Light Stretching (10 mins)**: Simple yoga poses to maintain flexibility",
-                "🏓 **Fun Activities**: Play games like table tennis or badminton with friends",
-                "🎵 **Dance Therapy (15 mins)**: Put on your favorite music and dance freely"
-            ],
-            "medium_stress": [
-                "🏃‍♀️ **Moderate Cardio (20-30 mins)**: Jogging, cycling, or swimming",
-                "🧘‍♀️ **Yoga Session (20-30 mins)**: Practice stress-relieving yoga poses",
-                "💪 **Strength Training (20 mins)**: Light weights or bodyweight exercises",
-                "🎨 **Creative Expression**: Drawing, painting, or writing in a journal",
-                "🌊 **Progressive Muscle Relaxation (15 mins)**: Tense and relax muscle groups",
-                "🎶 **Music Meditation (10-15 mins)**: Listen to calming instrumental music"
-            ],
-            "high_stress": [
-                "🏃‍♀️ **High-Intensity Cardio (30-45 mins)**: Running, HIIT workouts, or sports",
-                "🧘‍♀️ **Extended Meditation (20-30 mins)**: Deep mindfulness or guided meditation",
-                "💪 **Strength Training (30-45 mins)**: Weight lifting to release tension",
-                "🥊 **Kickboxing/Martial Arts (30 mins)**: Channel energy into structured combat sports",
-                "🌿 **Nature Therapy**: Spend 1-2 hours in natural settings (hiking, gardening)",
-                "📝 **Journaling (15-20 mins)**: Write about your thoughts and feelings",
-                "🛀 **Relaxation Routine**: Hot bath, aromatherapy, and gentle stretching"
-            ]
-        }
+        self.stress_descriptions = MappingProxyType({
+            "low_stress": "Low Stress - You're managing well! 😊",
+            "medium_stress": "Moderate Stress - Some areas need attention 🤔",
+            "high_stress": "High Stress - Priority support needed 🚨"
+        })
         
-        # Bhagavad Gita slokas with translations
-        self.gita_slokas = {
-            "low_stress": [
-                {
-                    "sanskrit": "योगस्थः कुरु कर्माणि सङ्गं त्यक्त्वा धनञ्जय। सिद्ध्यसिद्ध्योः समो भूत्वा समत्वं योग उच्यते॥",
-                    "translation": "Perform your duties while maintaining equanimity in success and failure. This balanced state of mind is called Yoga.",
-                    "chapter": "Chapter 2, Verse 48",
-                    "relevance": "Maintain balance and peace in daily activities"
-                },
-                {
-                    "sanskrit": "सुखदुःखे समे कृत्वा लाभालाभौ जयाजयौ। ततो युद्धाय युज्यस्व नैवं पापमवाप्स्यसि॥",
-                    "translation": "Fight for the sake of duty, treating pleasure and pain, gain and loss, victory and defeat alike.",
-                    "chapter": "Chapter 2, Verse 38",
-                    "relevance": "Face life's challenges with equanimity"
-                }
-            ],
-            "medium_stress": [
-                {
-                    "sanskrit": "मन्मना भव मद्भक्तो मद्याजी मां नमस्कुरु। मामेवैष्यसि सत्यं ते प्रतिजाने प्रियोऽसि मे॥",
-                    "translation": "Focus your mind on the divine, be devoted, worship, and surrender. You will surely reach the supreme destination.",
-                    "chapter": "Chapter 18, Verse 65",
-                    "relevance": "Find peace through spiritual connection and devotion"
-                },
-                {
-                    "sanskrit": "तस्माद्योगाय युज्यस्व योग करमसु कौशलम्। कर्मजं बुद्धियुक्ता हि फलं त्यक्त्वा मनीषिणः॥",
-                    "translation": "Therefore, engage in yoga and perform actions with skill. Wise people abandon attachment to results.",
-                    "chapter": "Chapter 2, Verse 50",
-                    "relevance": "Perform duties without attachment to outcomes"
-                }
-            ],
-            "high_stress": [
-                {
-                    "sanskrit": "सर्वधर्मान्परित्यज्य मामेकं शरणं व्रज। अहं त्वां सर्वपापेभ्यो मोक्षयिष्यामि मा शुचः॥",
-                    "translation": "Abandon all varieties of dharma and surrender unto me alone. I will deliver you from all sins, do not despair.",
-                    "chapter": "Chapter 18, Verse 66",
-                    "relevance": "Find ultimate peace through complete surrender and faith"
-                },
-                {
-                    "sanskrit": "क्लैब्यं मा स्म गमः पार्थ नैतत्त्वय्युपपद्यते। क्षुद्रं हृदयदौर्बल्यं त्यक्त्वोत्तिष्ठ परन्तप॥",
-                    "translation": "Do not yield to cowardice, O Arjuna. It does not befit you. Cast off this weakness of heart and arise!",
-                    "chapter": "Chapter 2, Verse 3",
-                    "relevance": "Overcome fear and weakness with courage and determination"
-                },
-                {
-                    "sanskrit": "योगी युञ्जीत सततमात्मानं रहसि स्थितः। एकाकी यतचित्तात्मा निराशीरपरिग्रहः॥",
-                    "translation": "The yogi should constantly discipline the mind by remaining in solitude, alone, with controlled thoughts.",
-                    "chapter": "Chapter 6, Verse 10",
-                    "relevance": "Practice regular meditation and self-discipline for inner peace"
-                }
-            ]
-        }
+        # Personal insights come from a declarative rule table (insight_rules.json)
+        self.insight_rules = InsightRules.load(self.question_ids, insight_rules_path)
+        
+        # Exercises and Bhagavad Gita slokas, tagged by band, category and
+        # language, are read from a memory-mapped index (see content.py)
+        self.content = ContentCatalog.open()
 
     def calculate_stress_level(self, responses):
         total_score = sum(responses.values())
         max_score = len(self.questions) * 5
         stress_percentage = (total_score / max_score) * 100
         
-        if stress_percentage <= 40:
-            return "low_stress", stress_percentage, "Low Stress - You're managing well! 😊"
-        elif stress_percentage <= 70:
-            return "medium_stress", stress_percentage, "Moderate Stress - Some areas need attention 🤔"
+        if stress_percentage <= self.LOW_STRESS_MAX:
+            return "low_stress", stress_percentage, self.stress_descriptions["low_stress"]
+        elif stress_percentage <= self.MEDIUM_STRESS_MAX:
+            return "medium_stress", stress_percentage, self.stress_descriptions["medium_stress"]
         else:
-            return "high_stress", stress_percentage, "High Stress - Priority support needed 🚨"
+            return "high_stress", stress_percentage, self.stress_descriptions["high_stress"]
     
     def generate_insights(self, responses):
-        insights = []
-        
         # Analyze specific aspects
-        if responses.get('sleep_quality', 0) >= 4:
-            insights.append("💤 **Sleep Quality**: Consider establishing a better sleep routine")
-        
-        if responses.get('physical_activity', 0) >= 4:
-            insights.append("🏃‍♀️ **Physical Activity**: Increasing exercise could significantly improve your mood")
-        
-        if responses.get('social_connection', 0) >= 4:
-            insights.append("👥 **Social Connection**: Building stronger relationships may help reduce stress")
-        
-        if responses.get('anxiety_level', 0) >= 4:
-            insights.append("😰 **Anxiety Management**: Consider learning anxiety-reduction techniques")
-        
-        return insights
+        flags = self.insight_rules.evaluate_responses(responses, self.question_ids)
+        return self.insight_rules.messages(flags)
+    
+    def weight_matrix(self, weights):
+        # Accept a DataFrame keyed by question id or an (N x questions) array in question order
+        if hasattr(weights, "columns"):
+            weights = weights[list(self.question_ids)].to_numpy()
+        weights = np.asarray(weights)
+        if weights.ndim != 2 or weights.shape[1] != len(self.questions):
+            raise ValueError(
+                f"Expected an (N x {len(self.questions)}) weight matrix, got shape {weights.shape}"
+            )
+        return weights
+    
+    def calculate_stress_levels(self, weights):
+        # Vectorized calculate_stress_level over every row of a weight matrix
+        weights = self.weight_matrix(weights)
+        max_score = len(self.questions) * 5
+        stress_percentages = (weights.sum(axis=1) / max_score) * 100
+        return self.STRESS_LEVELS[self.stress_band_index(stress_percentages)], stress_percentages
+    
+    def stress_band_index(self, stress_percentages):
+        # Position of each percentage's band in STRESS_LEVELS (0 low, 1 medium, 2 high)
+        stress_percentages = np.asarray(stress_percentages)
+        band_index = (stress_percentages > self.LOW_STRESS_MAX).astype(np.int8)
+        band_index += stress_percentages > self.MEDIUM_STRESS_MAX
+        return band_index
+    
+    def generate_insight_flags(self, weights):
+        # Vectorized generate_insights: one boolean column per insight rule
+        return self.insight_rules.evaluate(self.weight_matrix(weights))
+    
+    def score_batch(self, weights):
+        weights = self.weight_matrix(weights)
+        stress_levels, stress_percentages = self.calculate_stress_levels(weights)
+        return stress_levels, stress_percentages, self.generate_insight_flags(weights)
+    
+    def insights_from_flags(self, flags):
+        return self.insight_rules.messages(flags)
+    
+    def weak_categories(self, weights):
+        # Categories of questions answered WEAK_WEIGHT or worse, worst first;
+        # weights are in question order
+        weak = [(weight, question.category) for question, weight in zip(self.questions, weights) if weight >= self.WEAK_WEIGHT]
+        return tuple(category for _, category in sorted(weak, key=lambda item: -item[0]))
+    
+    def select_content(self, stress_level, weak_categories=(), seed=0, language=DEFAULT_LANGUAGE):
+        # Deterministic for a given seed, so a user sees the same picks on every rerun
+        exercises = self.content.select("exercise", stress_level, weak_categories, language, seed, self.EXERCISE_LIMIT)
+        slokas = self.content.select("sloka", stress_level, weak_categories, language, seed, self.SLOKA_LIMIT)
+        return [exercise["text"] for exercise in exercises], slokas
+    
+    def build_results_summary(self, responses, completed_at):
+        stress_level, stress_percentage, _ = self.calculate_stress_level(responses)
+        return {
+            "date": completed_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "stress_level": stress_level,
+            "stress_percentage": stress_percentage,
+            "responses": {question_id: responses[question_id] for question_id in self.question_ids},
+            "insights": self.generate_insights(responses)
+        }
+
+
+@st.cache_resource
+def load_assessment():
+    # Question bank and content are built once per process and shared by every session
+    return YouthWellBeingAssessment()
+
+@st.cache_resource
+def load_results_store():
+    # One store (and one background writer thread) per process
+    return store.ResultsStore(os.environ.get("YOUTHWELL_DB_PATH", store.DEFAULT_DB_PATH))
+
+@st.cache_resource
+def load_history_store():
+    return history.HistoryStore(os.environ.get("YOUTHWELL_HISTORY_DIR", history.DEFAULT_HISTORY_DIR))
+
+def render_progress(assessment, trend):
+    import pandas as pd
+    
+    st.markdown('<h3 class="section-header">📈 Your Progress</h3>', unsafe_allow_html=True)
+    
+    levels = trend["stress_levels"]
+    previous, latest = (assessment.stress_descriptions[level].split(" - ")[0] for level in levels[-2:])
+    if trend["band_changes"] == 0:
+        st.write(f"You have stayed at **{latest}** across all {len(levels)} assessments.")
+    elif previous == latest:
+        st.write(f"Still at **{latest}** since last time ({trend['band_changes']} band changes over {len(levels)} assessments).")
+    else:
+        st.write(f"Moved from **{previous}** to **{latest}** since last time ({trend['band_changes']} band changes over {len(levels)} assessments).")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Stress level (%) with rolling average")
+        st.line_chart(pd.DataFrame({
+            "Stress Level (%)": trend["stress_percentages"],
+            "Rolling average": trend["rolling_percentages"]
+        }, index=pd.to_datetime(trend["timestamps"])))
+    with col2:
+        st.caption("Categories compared with your previous assessment (lower is better)")
+        st.dataframe(pd.DataFrame({
+            "Change": trend["category_deltas"],
+            "Recent average": trend["category_rolling_means"].round(2)
+        }, index=figures.CATEGORY_LABELS), use_container_width=True)
+
+def cohort_comparison(assessment, responses):
+    # Percentile ranks against every stored result, from the score histograms
+    aggregates = load_results_store().cohort_aggregates(include_daily=False)
+    weights = [responses[question_id] for question_id in assessment.question_ids]
+    return {
+        "cohort_size": aggregates.total,
+        "overall": aggregates.score_percentile(weights),
+        "categories": aggregates.category_percentiles(weights)
+    }
+
+def render_comparison(comparison):
+    import pandas as pd
+    
+    st.markdown('<h3 class="section-header">🧭 How You Compare</h3>', unsafe_allow_html=True)
+    st.write(
+        f"Your stress level is higher than about **{comparison['overall']:.0f}%** of the "
+        f"{comparison['cohort_size']:,} assessments completed so far."
+    )
+    st.dataframe(
+        pd.DataFrame({"Percentile (higher means more strain)": comparison["categories"].round(0)}, index=figures.CATEGORY_LABELS),
+        use_container_width=True
+    )
+
+def render_dashboard(assessment):
+    import pandas as pd
+    
+    st.markdown('<h2 class="section-header">📈 Counsellor Dashboard</h2>', unsafe_allow_html=True)
+    
+    # Built from the store's running totals, so this costs the same for any cohort size
+    aggregates = load_results_store().cohort_aggregates()
+    if not aggregates.total:
+        st.info("No completed assessments yet.")
+        return
+    
+    # Stress band distribution
+    cols = st.columns(4)
+    cols[0].metric("Assessments", f"{aggregates.total:,}")
+    for col, level in zip(cols[1:], assessment.STRESS_LEVELS):
+        count = aggregates.band_counts[level]
+        col.metric(assessment.stress_descriptions[level].split(" - ")[0], f"{count:,}", f"{count / aggregates.total:.1%}", delta_color="off")
+    
+    # Per-question means and answer histograms
+    st.markdown('<h3 class="section-header">📊 Categories</h3>', unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.dataframe(
+            pd.DataFrame({"Mean (1-5)": aggregates.question_means().round(2)}, index=figures.CATEGORY_LABELS),
+            use_container_width=True
+        )
+    with col2:
+        st.bar_chart(pd.DataFrame(
+            aggregates.question_histogram(),
+            index=figures.CATEGORY_LABELS,
+            columns=[f"Weight {weight}" for weight in range(1, 6)]
+        ))
+    
+    # Daily trends
+    st.markdown('<h3 class="section-header">📅 Daily Trends</h3>', unsafe_allow_html=True)
+    days, counts, mean_percentage = aggregates.daily_trend()
+    days = pd.to_datetime(days)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.caption("Assessments per day by stress band")
+        st.bar_chart(pd.DataFrame(counts, index=days, columns=list(assessment.STRESS_LEVELS)))
+    with col2:
+        st.caption("Mean stress level (%) per day")
+        st.line_chart(pd.DataFrame({"Stress Level (%)": mean_percentage}, index=days))
+
+ASSESSMENT_PAGE = "📝 Assessment"
+DASHBOARD_PAGE = "📈 Counsellor Dashboard"
+
+# The cohort dashboard is for counsellors only, so students never see it unless
+# the app is started with YOUTHWELL_DASHBOARD=1 (e.g. a separate instance for staff)
+DASHBOARD_ENABLED = os.environ.get("YOUTHWELL_DASHBOARD") == "1"
 
 def main():
+    configure_page()
     st.markdown('<h1 class="main-header">🧘 YouthWell - Mental Health Assessment</h1>', unsafe_allow_html=True)
     
-    assessment = YouthWellBeingAssessment()
+    assessment = load_assessment()
+    
+    page = ASSESSMENT_PAGE
+    if DASHBOARD_ENABLED:
+        with st.sidebar:
+            page = st.selectbox("Page", [ASSESSMENT_PAGE, DASHBOARD_PAGE], key="page")
+    if page == DASHBOARD_PAGE:
+        render_dashboard(assessment)
+        return
     
     # Initialize session state
+    if 'user_id' not in st.session_state:
+        # ?user=<id> links retakes to the same history; new visitors get an id put in the URL
+        st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+        st.query_params["user"] = st.session_state.user_id
     if 'responses' not in st.session_state:
         st.session_state.responses = {}
     if 'assessment_complete' not in st.session_state:
@@ -245,6 +415,8 @@ def main():
         if st.button("🔄 Reset Assessment"):
             st.session_state.responses = {}
             st.session_state.assessment_complete = False
+            st.session_state.trend = None
+            st.session_state.comparison = None
             st.rerun()
     
     # Main assessment area
@@ -257,21 +429,38 @@ def main():
             for question in assessment.questions:
                 st.markdown(f'<div class="question-box">', unsafe_allow_html=True)
                 response = st.radio(
-                    question["question"],
-                    options=question["options"],
-                    key=question["id"],
-                    index=None if question["id"] not in st.session_state.responses else question["options"].index(st.session_state.responses[question["id"]])
+                    question.question,
+                    options=question.options,
+                    key=question.id,
+                    index=None if question.id not in st.session_state.responses else question.index_by_weight[st.session_state.responses[question.id]]
                 )
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 if response:
-                    weight_index = question["options"].index(response)
-                    st.session_state.responses[question["id"]] = question["weights"][weight_index]
+                    st.session_state.responses[question.id] = question.weight_by_option[response]
             
             submitted = st.form_submit_button("🚀 Complete Assessment", use_container_width=True)
             
             if submitted and len(st.session_state.responses) == len(assessment.questions):
                 st.session_state.assessment_complete = True
+                st.session_state.completed_at = datetime.now()
+                with metrics.section("submit.comparison"):
+                    # Compared against earlier results, before this one is recorded
+                    st.session_state.comparison = cohort_comparison(assessment, st.session_state.responses)
+                with metrics.section("submit.record"):
+                    # Queued for the store's writer thread, so submitting never waits on disk
+                    load_results_store().record(
+                        assessment.build_results_summary(st.session_state.responses, st.session_state.completed_at)
+                    )
+                with metrics.section("submit.history"):
+                    # Trends are computed once per completion and reused on every results rerun
+                    history_store = load_history_store()
+                    history_store.append(
+                        st.session_state.user_id,
+                        st.session_state.completed_at,
+                        [st.session_state.responses[question_id] for question_id in assessment.question_ids]
+                    )
+                    st.session_state.trend = history.summarize(history_store.load(st.session_state.user_id), assessment)
                 st.rerun()
             elif submitted:
                 st.warning("Please answer all questions before submitting.")
@@ -283,51 +472,29 @@ def main():
         # Results header
         st.markdown('<h2 class="section-header">📊 Your Assessment Results</h2>', unsafe_allow_html=True)
         
+        # Compare with the previous assessment when this user has one
+        trend = st.session_state.get("trend")
+        previous_percentage = None
+        if trend is not None and len(trend["stress_percentages"]) > 1:
+            previous_percentage = float(trend["stress_percentages"][-2])
+        
         # Stress level visualization
         col1, col2, col3 = st.columns([2, 1, 2])
         
-        with col1:
+        with col1, metrics.section("results.gauge"):
             # Gauge chart for stress level
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number+delta",
-                value = stress_percentage,
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "Stress Level (%)"},
-                gauge = {
-                    'axis': {'range': [None, 100]},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 40], 'color': "lightgreen"},
-                        {'range': [40, 70], 'color': "yellow"},
-                        {'range': [70, 100], 'color': "red"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': 90
-                    }
-                }
-            ))
-            fig.update_layout(height=300)
+            fig = figures.gauge_figure(stress_percentage, previous_percentage)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.metric("Stress Level", f"{stress_percentage:.1f}%", 
-                     delta=None, delta_color="inverse")
+                     delta=None if previous_percentage is None else f"{stress_percentage - previous_percentage:+.1f}%",
+                     delta_color="inverse")
         
-        with col3:
+        with col3, metrics.section("results.category_bar"):
             # Category breakdown
-            categories = ['Sleep', 'Stress', 'Social', 'Physical', 'Mood', 'Focus', 'Life Sat.', 'Anxiety']
-            scores = list(st.session_state.responses.values())
-            
-            fig_bar = px.bar(
-                x=categories, 
-                y=scores,
-                title="Category Breakdown",
-                color=scores,
-                color_continuous_scale="RdYlGn_r"
-            )
-            fig_bar.update_layout(height=300, showlegend=False)
+            scores = tuple(st.session_state.responses[question_id] for question_id in assessment.question_ids)
+            fig_bar = figures.category_bar_figure(scores)
             st.plotly_chart(fig_bar, use_container_width=True)
         
         # Stress level description
@@ -338,74 +505,38 @@ def main():
         else:
             st.error(stress_description)
         
-        # Insights
-        insights = assessment.generate_insights(st.session_state.responses)
-        if insights:
-            st.markdown('<h3 class="section-header">💡 Personal Insights</h3>', unsafe_allow_html=True)
-            for insight in insights:
-                st.markdown(f'<div class="suggestion-box">{insight}</div>', unsafe_allow_html=True)
-        
-        # Exercise recommendations
-        st.markdown('<h3 class="section-header">🏃‍♀️ Recommended Exercises</h3>', unsafe_allow_html=True)
-        exercises = assessment.exercises[stress_level]
+        if previous_percentage is not None:
+            with metrics.section("results.progress"):
+                render_progress(assessment, trend)
         
-        cols = st.columns(2)
-        for i, exercise in enumerate(exercises):
-            with cols[i % 2]:
-                st.markdown(f'<div class="suggestion-box">{exercise}</div>', unsafe_allow_html=True)
+        # Percentiles mean little until enough students have taken the assessment
+        comparison = st.session_state.get("comparison")
+        if comparison is not None and comparison["cohort_size"] >= assessment.COMPARISON_MIN_COHORT:
+            with metrics.section("results.comparison"):
+                render_comparison(comparison)
         
-        # Bhagavad Gita Slokas
-        st.markdown('<h3 class="section-header">🕉️ Wisdom from Bhagavad Gita</h3>', unsafe_allow_html=True)
-        slokas = assessment.gita_slokas[stress_level]
+        # Insights
+        with metrics.section("results.insights"):
+            insights = assessment.generate_insights(st.session_state.responses)
+            if insights:
+                st.markdown(fragments.insights_html(tuple(insights)), unsafe_allow_html=True)
         
-        for sloka in slokas:
-            st.markdown(f'''
-            <div class="sloka-box">
-                <h4 style="color: #8B4513; margin-bottom: 10px;">{sloka["chapter"]}</h4>
-                <p style="font-size: 1.1em; color: #2F4F4F; margin-bottom: 15px;"><strong>Sanskrit:</strong><br>{sloka["sanskrit"]}</p>
-                <p style="color: #556B2F; margin-bottom: 10px;"><strong>Translation:</strong><br>{sloka["translation"]}</p>
-                <p style="color: #8B0000; font-size: 0.9em;"><strong>Relevance:</strong> {sloka["relevance"]}</p>
-            </div>
-            ''', unsafe_allow_html=True)
+        # Exercise recommendations and Bhagavad Gita slokas
+        with metrics.section("results.content_selection"):
+            weak_categories = assessment.weak_categories(
+                [st.session_state.responses[question_id] for question_id in assessment.question_ids]
+            )
+            exercises, slokas = assessment.select_content(
+                stress_level, weak_categories, seed=user_seed(st.session_state.user_id)
+            )
+        with metrics.section("results.exercises"):
+            st.markdown(fragments.exercises_html(tuple(exercises)), unsafe_allow_html=True)
+        with metrics.section("results.slokas"):
+            st.markdown(fragments.slokas_html(fragments.sloka_key(slokas)), unsafe_allow_html=True)
         
         # Additional recommendations
-        st.markdown('<h3 class="section-header">🌟 Additional Recommendations</h3>', unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            ### 📱 **Digital Wellness**
-            - Limit social media usage
-            - Practice digital detox regularly
-            - Use apps for meditation and mindfulness
-            - Set boundaries for screen time
-            """)
-            
-            st.markdown("""
-            ### 🍎 **Nutrition Tips**
-            - Eat regular, balanced meals
-            - Stay hydrated (8-10 glasses water/day)
-            - Include omega-3 rich foods
-            - Limit caffeine and sugar intake
-            """)
-        
-        with col2:
-            st.markdown("""
-            ### 😴 **Sleep Hygiene**
-            - Maintain consistent sleep schedule
-            - Create a relaxing bedtime routine
-            - Keep bedroom cool and dark
-            - Avoid screens 1 hour before bed
-            """)
-            
-            st.markdown("""
-            ### 🤝 **Social Support**
-            - Connect with friends and family regularly
-            - Join clubs or groups with similar interests
-            - Practice active listening
-            - Seek professional help when needed
-            """)
+        with metrics.section("results.recommendations"):
+            st.markdown(fragments.recommendations_html(), unsafe_allow_html=True)
         
         # Emergency resources
         st.markdown('<h3 class="section-header">🆘 Emergency Resources</h3>', unsafe_allow_html=True)
@@ -421,21 +552,30 @@ def main():
         # Save results option
         st.markdown('<h3 class="section-header">💾 Save Your Results</h3>', unsafe_allow_html=True)
         
-        results_summary = {
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "stress_level": stress_level,
-            "stress_percentage": stress_percentage,
-            "responses": st.session_state.responses,
-            "insights": insights
-        }
-        
-        if st.download_button(
-            label="📁 Download Results (JSON)",
-            data=json.dumps(results_summary, indent=2),
-            file_name=f"youthwell_assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
-        ):
+        with metrics.section("results.download"):
+            # Same shape as the stored record, so downloads can be fed to ingest.py
+            results_summary = assessment.build_results_summary(st.session_state.responses, st.session_state.completed_at)
+            
+            # Serialized only when the button is clicked, not on every results rerun
+            downloaded = st.download_button(
+                label="📁 Download Results (JSON)",
+                data=functools.partial(json.dumps, results_summary, indent=2),
+                file_name=f"youthwell_assessment_{st.session_state.completed_at.strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json"
+            )
+        if downloaded:
             st.success("Results downloaded successfully!")
 
+def rerun_label():
+    # Label for the whole-rerun latency, taken from the page the rerun starts
+    # on. The questionnaire rerun that submits the form does the recording
+    # work before switching to results, so it gets its own label.
+    if DASHBOARD_ENABLED and st.session_state.get("page") == DASHBOARD_PAGE:
+        return "rerun.dashboard"
+    if st.session_state.get("assessment_complete"):
+        return "rerun.results"
+    return lambda: "rerun.submit" if st.session_state.get("assessment_complete") else "rerun.questionnaire"
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with metrics.section(rerun_label()):
+        main()